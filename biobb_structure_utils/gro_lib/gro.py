@@ -1,5 +1,19 @@
 import re
 import sys
+from collections import namedtuple
+from itertools import chain
+
+import numpy as np
+
+# residue and atom names are fixed-width (5 characters) fields in a gro file
+NAME_DTYPE = "U5"
+INDEX_DTYPE = np.int32
+FLOAT_DTYPE = np.float64
+# number of atoms formatted at once when writing a gro file
+WRITE_CHUNK_SIZE = 65536
+
+# runs of consecutive atoms sharing residue_id and residue_name: row range [start, end) and residue of every run
+ResidueIndex = namedtuple("ResidueIndex", ["start", "end", "residue_id", "residue_name"])
 
 
 class Gro:
@@ -7,6 +21,20 @@ class Gro:
     the central class in gropy
     """
 
+    # per-atom fields, each one stored as a NumPy array column
+    COLUMNS = (
+        "residue_id",
+        "residue_name",
+        "atom_name",
+        "atom_id",
+        "x",
+        "y",
+        "z",
+        "v_x",
+        "v_y",
+        "v_z",
+    )
+
     # -- constructor(s) --
     def __init__(
         self,
@@ -23,115 +51,399 @@ class Gro:
         v_y=None,
         v_z=None,
         box=None,
+        float_dtype=FLOAT_DTYPE,
     ):
         """
-        wrap the contents in a GROMACS gro file in a class
+        wrap the contents in a GROMACS gro file in a class;
+        coordinates and velocities are stored as float_dtype (float64 or float32) arrays
         """
         self.system_name = system_name or "This is a Gro!"
         self.num_of_atoms = num_of_atoms or 0
-        self.residue_id = residue_id or []
-        self.residue_name = residue_name or []
-        self.atom_name = atom_name or []
-        self.atom_id = atom_id or []
-        self.x = x or []
-        self.y = y or []
-        self.z = z or []
-        self.v_x = v_x or []
-        self.v_y = v_y or []
-        self.v_z = v_z or []
+        self.float_dtype = np.dtype(float_dtype)
+        self.residue_id = self._as_column(residue_id, "residue_id")
+        self.residue_name = self._as_column(residue_name, "residue_name")
+        self.atom_name = self._as_column(atom_name, "atom_name")
+        self.atom_id = self._as_column(atom_id, "atom_id")
+        self.x = self._as_column(x, "x")
+        self.y = self._as_column(y, "y")
+        self.z = self._as_column(z, "z")
+        self.v_x = self._as_column(v_x, "v_x")
+        self.v_y = self._as_column(v_y, "v_y")
+        self.v_z = self._as_column(v_z, "v_z")
         self.box = box or [0.0, 0.0, 0.0]
+        self.has_velocities = v_x is not None
+        # raw bytes of the atom lines as read from the file, empty for the atoms modified since;
+        # None unless the file was read with keep_raw_lines
+        self.raw_line = None
+        # decimals of the coordinates in the raw lines, velocities having one more as GROMACS writes them
+        self.precision = 3
+        self._residue_index = None
+        # per column, the over-allocated buffer the column is a prefix view of and its filled length
+        self._append_buffers = {}
+
+    # -- column helpers --
+    def column_dtype(self, column):
+        """
+        return the NumPy dtype used to store the provided column
+        """
+        if column in ("residue_id", "atom_id"):
+            return np.dtype(INDEX_DTYPE)
+        if column in ("residue_name", "atom_name"):
+            return np.dtype(NAME_DTYPE)
+        return self.float_dtype
+
+    def _as_column(self, values, column):
+        """
+        copy any sequence of values to a new contiguous NumPy array with the dtype of the provided column,
+        so that the columns never share memory with the caller
+        """
+        if values is None:
+            values = []
+        return np.array(values, dtype=self.column_dtype(column), copy=True)
+
+    def _row_columns(self):
+        """
+        return the per-atom columns currently stored, including the raw lines if they are kept
+        """
+        if self.raw_line is None:
+            return self.COLUMNS
+        return self.COLUMNS + ("raw_line",)
+
+    def _shares_raw_lines(self, another_gro_object):
+        """
+        return whether the raw lines of another gro object can be mixed with the ones of current gro object
+        """
+        return another_gro_object.raw_line is not None and another_gro_object.precision == self.precision
+
+    def invalidate_raw_lines(self, atom_mask):
+        """
+        forget the raw lines of the atoms flagged in atom_mask, so that they are formatted from their columns
+        on write; call it after modifying the columns of a Gro object read with keep_raw_lines
+        """
+        if self.raw_line is not None:
+            self.raw_line[np.asarray(atom_mask, dtype=bool)] = b""
+
+    def residue_index(self):
+        """
+        return the ResidueIndex of current gro object, building it on first use;
+        it is rebuilt after any operation of the class, call invalidate_residue_index after modifying
+        the residue_id or residue_name columns directly
+        """
+        if self._residue_index is None:
+            new_run = np.ones(self.num_of_atoms, dtype=bool)
+            new_run[1:] = (self.residue_id[1:] != self.residue_id[:-1]) | (
+                self.residue_name[1:] != self.residue_name[:-1]
+            )
+            start = np.flatnonzero(new_run)
+            end = np.append(start[1:], self.num_of_atoms)
+            self._residue_index = ResidueIndex(
+                start, end, self.residue_id[start], self.residue_name[start]
+            )
+        return self._residue_index
+
+    def invalidate_residue_index(self):
+        """
+        discard the cached ResidueIndex, it will be rebuilt on next use
+        """
+        self._residue_index = None
+
+    def _residue_runs(self, residue_id, residue_name):
+        """
+        return the residue runs of the specified residue
+        """
+        index = self.residue_index()
+        return np.flatnonzero(
+            (index.residue_id == residue_id) & (index.residue_name == residue_name)
+        )
+
+    def _residue_rows(self, residue_mask):
+        """
+        return the indices of the atoms of the residue runs flagged in residue_mask, in atom order
+        """
+        index = self.residue_index()
+        return np.flatnonzero(np.repeat(residue_mask, index.end - index.start))
+
+    def _allocate_columns(self, num_of_atoms):
+        """
+        allocate empty columns for num_of_atoms atoms
+        """
+        self.invalidate_residue_index()
+        for column in self.COLUMNS:
+            setattr(
+                self, column, np.zeros(num_of_atoms, dtype=self.column_dtype(column))
+            )
+        self._append_buffers = {}
+
+    def _append_rows(self, another_gro_object, atom_indices):
+        """
+        append the atoms in atom_indices (an array of indices or a slice) of another gro object
+        to the end of current gro object
+        """
+        if isinstance(atom_indices, slice):
+            num_of_new_atoms = len(range(*atom_indices.indices(another_gro_object.num_of_atoms)))
+        else:
+            atom_indices = np.asarray(atom_indices, dtype=np.intp)
+            num_of_new_atoms = len(atom_indices)
+        self.invalidate_residue_index()
+        if self.raw_line is not None:
+            if self._shares_raw_lines(another_gro_object):
+                raw_line = another_gro_object.raw_line[atom_indices]
+            else:
+                raw_line = np.zeros(num_of_new_atoms, dtype="S1")
+            self._extend_column("raw_line", raw_line, np.result_type(self.raw_line, raw_line))
+        for column in self.COLUMNS:
+            self._extend_column(
+                column, getattr(another_gro_object, column)[atom_indices], self.column_dtype(column)
+            )
+        self.num_of_atoms += num_of_new_atoms
+        self.has_velocities = self.has_velocities or another_gro_object.has_velocities
+
+    def _extend_column(self, column, values, dtype):
+        """
+        append values to the end of a column, which is kept as a prefix view of a buffer doubled when full,
+        so that appending atoms one by one takes amortized constant time per atom
+        """
+        current = getattr(self, column)
+        length = len(current) + len(values)
+        buffer, filled = self._append_buffers.get(column, (None, 0))
+        # the buffer is only extended through the column that views all of its filled part, a shallow copy
+        # of the object or a column replaced since the last append gets a buffer of its own
+        if buffer is None or not all(
+            (
+                current.base is buffer,
+                filled == len(current),
+                len(buffer) >= length,
+                buffer.dtype == dtype,
+                current.ctypes.data == buffer.ctypes.data,
+                current.strides == buffer.strides,
+            )
+        ):
+            buffer = np.empty(max(2 * length, 16), dtype=dtype)
+            buffer[:len(current)] = current
+        buffer[len(current):length] = values
+        self._append_buffers[column] = (buffer, length)
+        setattr(self, column, buffer[:length])
 
     # -- deconstructor --
     # not mandatory in python
 
     # -- file i/o --
-    def read_gro_file(self, file_name):
-        """
-        read a gro file and store information in a Gro object
-        """
-        with open(file_name, "r") as file_id:
-            for i_line, line in enumerate(file_id):
-                line = line.replace("\n", "")
-
-                if i_line == 0:
-                    self.system_name = line
-                    continue
-
-                if i_line == 1:
-                    self.num_of_atoms = int(line)
-                    final_line_of_atoms = self.num_of_atoms + 1
-                    continue
-
-                if i_line <= final_line_of_atoms:
-                    # store atom information
-                    self.residue_id.append(int(line[0:5]))
-                    self.residue_name.append(
-                        line[5:10].strip()
-                    )  # remove leading spaces
-                    self.atom_name.append(line[10:15].strip())  # remove leading spaces
-                    self.atom_id.append(int(line[15:20]))
-                    self.x.append(float(line[20:28]))
-                    self.y.append(float(line[28:36]))
-                    self.z.append(float(line[36:44]))
-                    if len(line) > 44:
-                        self.v_x.append(float(line[44:52]))
-                        self.v_y.append(float(line[52:60]))
-                        self.v_z.append(float(line[60:68]))
-                    else:
-                        self.v_x.append(0.0)
-                        self.v_y.append(0.0)
-                        self.v_z.append(0.0)
-                else:
-                    self.box = line.split()
-                    self.box = [float(box_size) for box_size in self.box]
+    def read_gro_file(self, file_name, vectorized=True, keep_raw_lines=False):
+        """
+        read a gro file and store information in a Gro object;
+        if vectorized, the atom block is decoded in a single pass over its fixed-width columns,
+        falling back to the line by line reader for malformed or variable-precision files;
+        if keep_raw_lines, the atom lines are also kept as read and written back verbatim for unmodified atoms;
+        only the first frame of a multi-frame gro file is read, see iter_gro_frames
+        """
+        with open(file_name, "rb") as file_id:
+            self.read_gro_frame(file_id, vectorized=vectorized, keep_raw_lines=keep_raw_lines)
+
+    def read_gro_frame(self, file_id, vectorized=True, reuse_columns=False, keep_raw_lines=False):
+        """
+        read the next frame of a gro file opened in binary mode and store information in a Gro object;
+        return False if the end of the file, or only blank lines before it, has been reached;
+        if reuse_columns, the current columns are overwritten in place when their size matches the frame
+        """
+        title = file_id.readline()
+        if not title.strip():
+            # blank lines at the end of the file are not a frame, only a blank title followed by an atom count is
+            start_of_count = file_id.tell()
+            if not file_id.readline().strip().isdigit():
+                return False
+            file_id.seek(start_of_count)
+        self.system_name = title.decode().rstrip("\r\n")
+        self.num_of_atoms = int(file_id.readline())
+        if not (
+            reuse_columns and all(len(getattr(self, column)) == self.num_of_atoms for column in self.COLUMNS)
+        ):
+            self._allocate_columns(self.num_of_atoms)
+
+        self.raw_line = None
+        self.precision = 3
+        self.invalidate_residue_index()
+        if not (vectorized and self._read_atom_block(file_id, keep_raw_lines)):
+            self._read_atom_lines(file_id, keep_raw_lines)
+
+        self.box = [float(box_size) for box_size in file_id.readline().split()]
+        return True
+
+    def _read_atom_lines(self, file_id, keep_raw_lines=False):
+        """
+        read the atom records of a gro frame line by line;
+        as GROMACS does, the width of the float fields is the distance between the first two decimal points
+        and the coordinates have width - 5 decimals
+        """
+        width = 8
+        self.has_velocities = False
+        raw_lines = []
+        for i_atom in range(self.num_of_atoms):
+            raw_line = file_id.readline().rstrip(b"\r\n")
+            raw_lines.append(raw_line)
+            line = raw_line.decode()
+            if i_atom == 0:
+                first_point = line.find(".", 20)
+                second_point = line.find(".", first_point + 1)
+                if first_point != -1 and second_point != -1:
+                    width = second_point - first_point
+                    self.precision = width - 5
+            # store atom information
+            self.residue_id[i_atom] = int(line[0:5])
+            self.residue_name[i_atom] = line[5:10].strip()  # remove leading spaces
+            self.atom_name[i_atom] = line[10:15].strip()  # remove leading spaces
+            self.atom_id[i_atom] = int(line[15:20])
+            self.x[i_atom] = float(line[20:20 + width])
+            self.y[i_atom] = float(line[20 + width:20 + 2 * width])
+            self.z[i_atom] = float(line[20 + 2 * width:20 + 3 * width])
+            if len(line) > 20 + 3 * width:
+                self.has_velocities = True
+                self.v_x[i_atom] = float(line[20 + 3 * width:20 + 4 * width])
+                self.v_y[i_atom] = float(line[20 + 4 * width:20 + 5 * width])
+                self.v_z[i_atom] = float(line[20 + 5 * width:20 + 6 * width])
+            else:
+                self.v_x[i_atom] = 0.0
+                self.v_y[i_atom] = 0.0
+                self.v_z[i_atom] = 0.0
+        if keep_raw_lines:
+            self.raw_line = np.array(raw_lines, dtype=np.bytes_)
+
+    def _read_atom_block(self, file_id, keep_raw_lines=False):
+        """
+        read the atom records of a fixed-width gro frame decoding all of them at once;
+        return False, rewinding the file to the first atom record, if the frame can not be decoded this way
+        """
+        start_of_atoms = file_id.tell()
+        first_line = file_id.readline()
+        # every atom record must have the same length: without or with velocities
+        line_length = len(first_line) - 1
+        if self.num_of_atoms <= 0 or line_length not in (44, 68) or not first_line.endswith(b"\n"):
+            file_id.seek(start_of_atoms)
+            return False
+        content = first_line + file_id.read((self.num_of_atoms - 1) * (line_length + 1))
+        if len(content) != self.num_of_atoms * (line_length + 1):
+            file_id.seek(start_of_atoms)
+            return False
+
+        atom_block = np.frombuffer(content, dtype=np.uint8).reshape(
+            self.num_of_atoms, line_length + 1
+        )
+        # standard precision puts the decimal point of each 8 char float field in the same column
+        decimal_columns = [24, 32, 40] if line_length == 44 else [24, 32, 40, 47, 55, 63]
+        if not (atom_block[:, -1] == ord("\n")).all() or not (
+            atom_block[:, decimal_columns] == ord(".")
+        ).all():
+            file_id.seek(start_of_atoms)
+            return False
+
+        fields = [
+            ("residue_id", "S5"),
+            ("residue_name", "S5"),
+            ("atom_name", "S5"),
+            ("atom_id", "S5"),
+            ("x", "S8"),
+            ("y", "S8"),
+            ("z", "S8"),
+        ]
+        if line_length == 68:
+            fields += [("v_x", "S8"), ("v_y", "S8"), ("v_z", "S8")]
+        fields.append(("end_of_line", "S1"))
+        records = atom_block.view(np.dtype(fields)).reshape(self.num_of_atoms)
+
+        try:
+            for column, _ in fields[:-1]:
+                values = records[column]
+                if column in ("residue_name", "atom_name"):
+                    values = np.char.strip(values)
+                np.copyto(getattr(self, column), values, casting="unsafe")
+        except (ValueError, UnicodeDecodeError):
+            file_id.seek(start_of_atoms)
+            return False
+        if line_length == 44:
+            for column in ("v_x", "v_y", "v_z"):
+                getattr(self, column)[:] = 0.0
+        self.has_velocities = line_length == 68
+        if keep_raw_lines:
+            self.raw_line = (
+                atom_block[:, :-1].copy().view("S%d" % line_length).reshape(self.num_of_atoms)
+            )
+        return True
 
     def write_gro_file(self, file_name):
         """
         write a gro file based on a Gro object
         """
         with open(file_name, "w") as file_id:
-            file_id.write("%s\n" % self.system_name)
-            file_id.write(" %d\n" % self.num_of_atoms)
-            if self.v_x != []:
-                for i in range(self.num_of_atoms):
-                    file_id.write(
-                        "%5d%-5s%5s%5d%8.3f%8.3f%8.3f%8.4f%8.4f%8.4f\n"
-                        % (
-                            self.residue_id[i],
-                            self.residue_name[i],
-                            self.atom_name[i],
-                            self.atom_id[i],
-                            self.x[i],
-                            self.y[i],
-                            self.z[i],
-                            self.v_x[i],
-                            self.v_y[i],
-                            self.v_z[i],
-                        )
-                    )
+            self.write_gro_frame(file_id)
+
+    def write_gro_frame(self, file_id):
+        """
+        write the Gro object as a frame to a gro file opened in text mode;
+        atoms are formatted in chunks of WRITE_CHUNK_SIZE, velocities are only written if present,
+        and residue and atom numbers wrap at 100000 to fit their 5 char fields, as GROMACS does
+        """
+        file_id.write("%s\n" % self.system_name)
+        file_id.write(" %d\n" % self.num_of_atoms)
+        with_velocities = self.has_velocities and len(self.v_x) > 0
+        for chunk_start in range(0, self.num_of_atoms, WRITE_CHUNK_SIZE):
+            chunk = slice(chunk_start, chunk_start + WRITE_CHUNK_SIZE)
+            if self.raw_line is None:
+                file_id.write(self._format_atom_lines(chunk, with_velocities))
             else:
-                for i in range(self.num_of_atoms):
-                    file_id.write(
-                        "%5d%-5s%5s%5d%8.3f%8.3f%8.3f%8.4f%8.4f%8.4f\n"
-                        % (
-                            self.residue_id[i],
-                            self.residue_name[i],
-                            self.atom_name[i],
-                            self.atom_id[i],
-                            self.x[i],
-                            self.y[i],
-                            self.z[i],
-                            0.0,
-                            0.0,
-                            0.0,
-                        )
-                    )
-
-            # Writting box coordinates
-            list(map(lambda box_coord: file_id.write("%10.5f" % box_coord), self.box))
-            # for box_coord in self.box:
-            #    file_id.write("%10.5f" % box_coord)
-            file_id.write("\n")
+                file_id.write(self._merge_raw_lines(chunk, with_velocities))
+
+        # Writting box coordinates
+        file_id.write("".join("%10.5f" % box_coord for box_coord in self.box) + "\n")
+
+    def _merge_raw_lines(self, chunk, with_velocities):
+        """
+        write back the raw lines of the atoms in the chunk slice, formatting only the atoms without one
+        at the precision of the raw lines
+        """
+        raw_line = self.raw_line[chunk]
+        formatted = np.flatnonzero(raw_line == b"")
+        if not len(formatted):
+            return (b"\n".join(raw_line.tolist()) + b"\n").decode()
+        lines = [line.decode() + "\n" for line in raw_line.tolist()]
+        formatted_lines = self._format_atom_lines(
+            formatted + chunk.start, with_velocities, self.precision
+        )
+        for i_atom, line in zip(formatted.tolist(), formatted_lines.splitlines(keepends=True)):
+            lines[i_atom] = line
+        return "".join(lines)
+
+    def _format_atom_lines(self, chunk, with_velocities, precision=3):
+        """
+        format the atoms in the chunk (a slice or an array of indices) as gro lines,
+        building every fixed-width field as a column of bytes;
+        coordinates have precision decimals and velocities one more, in fields of precision + 5 chars
+        """
+        residue_id = _wrap_gro_number(self.residue_id[chunk])
+        atom_id = _wrap_gro_number(self.atom_id[chunk])
+        float_columns = [self.x[chunk], self.y[chunk], self.z[chunk]]
+        width = precision + 5
+        decimals = [precision] * 3
+        if with_velocities:
+            float_columns += [self.v_x[chunk], self.v_y[chunk], self.v_z[chunk]]
+            decimals += [precision + 1] * 3
+
+        fields = [
+            _format_int_field(residue_id, 5),
+            _format_name_field(self.residue_name[chunk], 5, left_aligned=True),
+            _format_name_field(self.atom_name[chunk], 5, left_aligned=False),
+            _format_int_field(atom_id, 5),
+        ]
+        fields += [
+            _format_float_field(values, width, decimal) for values, decimal in zip(float_columns, decimals)
+        ]
+        if any(field is None for field in fields):
+            # some value does not fit its fixed-width field, let python format the whole chunk
+            atom_format = "%5d%-5s%5s%5d" + "".join("%%%d.%df" % (width, decimal) for decimal in decimals) + "\n"
+            values = [residue_id, self.residue_name[chunk], self.atom_name[chunk], atom_id] + float_columns
+            return (atom_format * len(residue_id)) % tuple(
+                chain.from_iterable(zip(*(value.tolist() for value in values)))
+            )
+        fields.append(np.full((len(residue_id), 1), ord("\n"), dtype=np.uint8))
+        return np.hstack(fields).tobytes().decode("ascii")
 
     # -- preservative operations --
     def rename_atoms(self, old_atom_names, new_atom_names):
@@ -141,11 +453,9 @@ class Gro:
         assert len(old_atom_names) == len(
             new_atom_names
         ), "old_atom_names doesn't have the same length as new_atom_names"
-        for i_atom in range(self.num_of_atoms):
-            for i_name in range(len(old_atom_names)):
-                if self.atom_name[i_atom] == old_atom_names[i_name]:
-                    self.atom_name[i_atom] = new_atom_names[i_name]
-                    break
+        self.invalidate_raw_lines(
+            self._rename_column("atom_name", old_atom_names, new_atom_names)
+        )
 
     # TODO: may add flexibility to rename atoms with specific residue_names
     def rename_residues(self, old_residue_names, new_residue_names):
@@ -155,37 +465,55 @@ class Gro:
         assert len(old_residue_names) == len(
             new_residue_names
         ), "old_residue_names doesn't have the same length as new_residue_names"
-        for i_atom in range(self.num_of_atoms):
-            for i_name in range(len(old_residue_names)):
-                if self.residue_name[i_atom] == old_residue_names[i_name]:
-                    self.residue_name[i_atom] = new_residue_names[i_name]
-                    break
+        self.invalidate_raw_lines(
+            self._rename_column("residue_name", old_residue_names, new_residue_names)
+        )
+        self.invalidate_residue_index()
+
+    def _rename_column(self, column, old_names, new_names):
+        """
+        rename the values of a name column mapping each unique name once, the first matching old name wins;
+        return the mask of renamed atoms
+        """
+        name_mapping = {}
+        for old_name, new_name in zip(old_names, new_names):
+            name_mapping.setdefault(old_name, new_name)
+        unique_names, inverse = np.unique(getattr(self, column), return_inverse=True)
+        unique_names = unique_names.tolist()
+        renamed = np.array([name in name_mapping for name in unique_names], dtype=bool)
+        if renamed.any():
+            renamed_names = self._as_column(
+                [name_mapping.get(name, name) for name in unique_names], column
+            )
+            setattr(self, column, renamed_names[inverse])
+        return renamed[inverse]
 
     def renumber_atoms(self, renumber_residues=True, renumber_residues_per_chain=True):
         """
         renumber residue_id and atom_id starting from 1; the original composition of each resdiue is maintained
         """
-        atom_mapping = {}
+        atom_ids = self.atom_id.tolist()
+        atom_mapping = dict(
+            zip(map(str, atom_ids), map(str, range(1, self.num_of_atoms + 1)))
+        )
         residue_mapping = {}
         residue_count = 0
         last_residue_id = sys.maxsize * -1
         chain_number = 1
         residue_mapping[str(chain_number)] = {}
         new_chain = False
-        for i_atom in range(self.num_of_atoms):
-            gro_atom_number = str(self.atom_id[i_atom])
-            new_atom_number = i_atom + 1
-            atom_mapping[str(gro_atom_number)] = str(new_atom_number)
-            self.atom_id[i_atom] = new_atom_number
-
+        # every atom of a residue run gets the same number, so walk the runs instead of the atoms
+        index = self.residue_index()
+        run_residue_ids = index.residue_id.tolist()
+        for i_run, residue_id in enumerate(run_residue_ids):
             # As in the GRO files there is no chain information, the residue number is used as heuristics.
-            if self.residue_id[i_atom] < last_residue_id:
+            if residue_id < last_residue_id:
                 new_chain = True
                 chain_number += 1
                 residue_mapping[str(chain_number)] = {}
 
             # New residue
-            if self.residue_id[i_atom] != last_residue_id:
+            if residue_id != last_residue_id:
                 residue_count += 1
                 # New chain
                 if renumber_residues_per_chain and new_chain:
@@ -193,13 +521,20 @@ class Gro:
                     new_chain = False
 
             if not renumber_residues:
-                residue_count = str(self.residue_id[i_atom])
+                residue_count = residue_id
 
-            residue_mapping[str(chain_number)][str(self.residue_id[i_atom])] = str(
-                residue_count
-            )
-            last_residue_id = self.residue_id[i_atom]
-            self.residue_id[i_atom] = residue_count
+            residue_mapping[str(chain_number)][str(residue_id)] = str(residue_count)
+            last_residue_id = residue_id
+            run_residue_ids[i_run] = residue_count
+
+        residue_ids = np.repeat(
+            self._as_column(run_residue_ids, "residue_id"), index.end - index.start
+        )
+        atom_ids = np.arange(1, self.num_of_atoms + 1, dtype=INDEX_DTYPE)
+        self.invalidate_raw_lines((residue_ids != self.residue_id) | (atom_ids != self.atom_id))
+        self.residue_id = residue_ids
+        self.atom_id = atom_ids
+        self.invalidate_residue_index()
 
         return residue_mapping, atom_mapping
 
@@ -207,111 +542,92 @@ class Gro:
         """
         replace the i-th atom of the current gro object with the j-th atom of another gro object
         """
-        self.residue_id[i_atom] = another_gro_object.residue_id[j_atom]
-        self.residue_name[i_atom] = another_gro_object.residue_name[j_atom]
-        self.atom_name[i_atom] = another_gro_object.atom_name[j_atom]
-        self.atom_id[i_atom] = another_gro_object.atom_id[j_atom]
-        self.x[i_atom] = another_gro_object.x[j_atom]
-        self.y[i_atom] = another_gro_object.y[j_atom]
-        self.z[i_atom] = another_gro_object.z[j_atom]
-        self.v_x[i_atom] = another_gro_object.v_x[j_atom]
-        self.v_y[i_atom] = another_gro_object.v_y[j_atom]
-        self.v_z[i_atom] = another_gro_object.v_z[j_atom]
+        for column in self.COLUMNS:
+            getattr(self, column)[i_atom] = getattr(another_gro_object, column)[j_atom]
+        self.invalidate_residue_index()
+        if self.raw_line is not None:
+            if self._shares_raw_lines(another_gro_object):
+                raw_line = another_gro_object.raw_line[j_atom]
+                if len(raw_line) > self.raw_line.dtype.itemsize:
+                    self.raw_line = self.raw_line.astype(another_gro_object.raw_line.dtype)
+                self.raw_line[i_atom] = raw_line
+            else:
+                self.raw_line[i_atom] = b""
+
+    def reorder_atom_entries(self, atom_order):
+        """
+        reorder the atom entries of current gro object following atom_order, a permutation of the atom indices
+        """
+        atom_order = np.asarray(atom_order, dtype=np.intp)
+        assert (
+            len(atom_order) == self.num_of_atoms
+        ), "atom_order doesn't have the same length as the number of atoms"
+        for column in self._row_columns():
+            setattr(self, column, getattr(self, column)[atom_order])
+        self._append_buffers = {}
+        self.invalidate_residue_index()
+
+    def _residue_name_sort_key(self, residue_name_list, unlisted_key):
+        """
+        return the position of each atom residue name in residue_name_list, or unlisted_key if it is not listed
+        """
+        sort_key = np.full(self.num_of_atoms, unlisted_key, dtype=np.intp)
+        for position, residue_name in reversed(list(enumerate(residue_name_list))):
+            sort_key[self.residue_name == residue_name] = position
+        return sort_key
 
     def sort_residues(self, residue_name_list):
         """
         sort residues in the provided order, attaching other unspecified residues to the end
         """
-        sorted_gro = Gro()
-        # copy provided to another
-        for residue_name in residue_name_list:
-            sorted_gro.copy_residues(self, [residue_name])
-        # remove provided
-        self.remove_residues(residue_name_list)
-        # copy unprovided to another
-        # for i_atom in range(self.num_of_atoms):
-        for i_atom in range(self.num_of_atoms):
-            sorted_gro.copy_atom_entry(self, i_atom)
-        # delete unprovided
-        # for i_atom in range(self.num_of_atoms):
-        for i_atom in range(self.num_of_atoms):
-            self.remove_atom_entry(0)
-        # copy all back from another
-        # for i_atom in range(sorted_gro.num_of_atoms):
-        for i_atom in range(sorted_gro.num_of_atoms):
-            self.copy_atom_entry(sorted_gro, i_atom)
+        sort_key = self._residue_name_sort_key(residue_name_list, len(residue_name_list))
+        self.reorder_atom_entries(np.argsort(sort_key, kind="stable"))
 
     def sort_residues2(self, residue_name_list):
         """
-        sort residues in the provided order, attaching other unspecified residues to the end
+        sort residues in the provided order, keeping other unspecified residues at the beginning
         """
-        ini_gro = Gro()
-        sorted_gro = Gro()
-        # copy provided to sorted slice
-        for residue_name in residue_name_list:
-            sorted_gro.copy_residues(self, [residue_name])
-        # remove provided
-        self.remove_residues(residue_name_list)
-
-        # copy unprovided to initial slice
-        for i_atom in range(self.num_of_atoms):
-            ini_gro.copy_atom_entry(self, i_atom)
-        # delete unprovided
-        for i_atom in range(self.num_of_atoms):
-            self.remove_atom_entry(0)
-
-        # copy all back from another
-        for i_atom in range(ini_gro.num_of_atoms):
-            self.copy_atom_entry(ini_gro, i_atom)
-        for i_atom in range(sorted_gro.num_of_atoms):
-            self.copy_atom_entry(sorted_gro, i_atom)
+        sort_key = self._residue_name_sort_key(residue_name_list, -1)
+        self.reorder_atom_entries(np.argsort(sort_key, kind="stable"))
 
     # -- additive operations --
     def copy_atom_entry(self, another_gro_object, i_atom):
         """
         copy the i-th atom entry from another gro object and append to the end of current gro object
         """
-        self.num_of_atoms += 1
-        self.residue_id.append(another_gro_object.residue_id[i_atom])
-        self.residue_name.append(another_gro_object.residue_name[i_atom])
-        self.atom_name.append(another_gro_object.atom_name[i_atom])
-        self.atom_id.append(another_gro_object.atom_id[i_atom])
-        self.x.append(another_gro_object.x[i_atom])
-        self.y.append(another_gro_object.y[i_atom])
-        self.z.append(another_gro_object.z[i_atom])
-        self.v_x.append(another_gro_object.v_x[i_atom])
-        self.v_y.append(another_gro_object.v_y[i_atom])
-        self.v_z.append(another_gro_object.v_z[i_atom])
+        self._append_rows(another_gro_object, [i_atom])
 
     def copy_residue_entry(self, another_gro_object, residue_id, residue_name):
         """
         copy atoms of the specified residue from another gro object and append to the end of current gro object
         """
-        for i_atom in range(another_gro_object.num_of_atoms):
-            if (
-                another_gro_object.residue_id[i_atom] == residue_id and another_gro_object.residue_name[i_atom] == residue_name
-            ):
-                self.copy_atom_entry(another_gro_object, i_atom)
+        index = another_gro_object.residue_index()
+        runs = another_gro_object._residue_runs(residue_id, residue_name)
+        if len(runs) == 1:
+            self._append_rows(
+                another_gro_object, slice(index.start[runs[0]], index.end[runs[0]])
+            )
+        else:
+            residue_mask = np.zeros(len(index.start), dtype=bool)
+            residue_mask[runs] = True
+            self._append_rows(another_gro_object, another_gro_object._residue_rows(residue_mask))
 
     def copy_atoms(self, another_gro_object, atom_name_list):
         """
         copy atoms with the provided atom names from another gro object and append to the end of current gro object
         """
-        for i_atom in range(another_gro_object.num_of_atoms):
-            for atom_name in atom_name_list:
-                if another_gro_object.atom_name[i_atom] == atom_name:
-                    self.copy_atom_entry(another_gro_object, i_atom)
-                    break
+        self._append_rows(
+            another_gro_object,
+            np.flatnonzero(_isin_names(another_gro_object.atom_name, atom_name_list)),
+        )
 
     def copy_residues(self, another_gro_object, residue_name_list):
         """
         copy atoms with the provided residue names from another gro object and append to the end of current gro object
         """
-        for i_atom in range(another_gro_object.num_of_atoms):
-            for residue_name in residue_name_list:
-                if another_gro_object.residue_name[i_atom] == residue_name:
-                    self.copy_atom_entry(another_gro_object, i_atom)
-                    break
+        index = another_gro_object.residue_index()
+        residue_mask = _isin_names(index.residue_name, residue_name_list)
+        self._append_rows(another_gro_object, another_gro_object._residue_rows(residue_mask))
 
     # TODO: may add to copy atoms with the providied atom names and residue names
 
@@ -319,81 +635,195 @@ class Gro:
     # In python, copying an object is often achived by utilizing the copy and deepcopy functions in the copy module.
 
     # -- subtractive operations --
+    def keep_atom_entries(self, keep_mask):
+        """
+        keep only the atom entries flagged in keep_mask, compacting all the columns in a single pass
+        """
+        keep_mask = np.asarray(keep_mask, dtype=bool)
+        assert (
+            len(keep_mask) == self.num_of_atoms
+        ), "keep_mask doesn't have the same length as the number of atoms"
+        for column in self._row_columns():
+            setattr(self, column, getattr(self, column)[keep_mask])
+        self._append_buffers = {}
+        self.num_of_atoms = int(np.count_nonzero(keep_mask))
+        self.invalidate_residue_index()
+
+    def remove_atom_entries(self, atom_indices):
+        """
+        remove the atom entries with the provided indices from current gro object
+        """
+        keep_mask = np.ones(self.num_of_atoms, dtype=bool)
+        keep_mask[np.asarray(atom_indices, dtype=np.intp)] = False
+        self.keep_atom_entries(keep_mask)
+
     def remove_atom_entry(self, i_atom):
         """
         remove the i-th atom entry from current gro object
         """
-        self.num_of_atoms -= 1
-        del self.residue_id[i_atom]
-        del self.residue_name[i_atom]
-        del self.atom_name[i_atom]
-        del self.atom_id[i_atom]
-        del self.x[i_atom]
-        del self.y[i_atom]
-        del self.z[i_atom]
-        del self.v_x[i_atom]
-        del self.v_y[i_atom]
-        del self.v_z[i_atom]
+        self.remove_atom_entries([i_atom])
 
     def remove_residue_entry(self, residue_id, residue_name):
         """
         remove atoms of the specified residue
         """
-        atom_indice_to_be_removed = []
-        for i_atom in range(self.num_of_atoms):
-            if (
-                self.residue_id[i_atom] == residue_id and self.residue_name[i_atom] == residue_name
-            ):
-                atom_indice_to_be_removed.append(
-                    i_atom
-                )  # save indice first; direct removal would shrink the atom list
-
-        num_of_atoms_to_be_removed = len(atom_indice_to_be_removed)
-        for i_atom in range(num_of_atoms_to_be_removed):
-            self.remove_atom_entry(
-                atom_indice_to_be_removed[i_atom] - i_atom
-            )  # shift atom indice to match the shrinkage of atom list
+        index = self.residue_index()
+        keep_mask = np.ones(self.num_of_atoms, dtype=bool)
+        for i_run in self._residue_runs(residue_id, residue_name):
+            keep_mask[index.start[i_run]:index.end[i_run]] = False
+        self.keep_atom_entries(keep_mask)
 
     def remove_atoms(self, atom_name_list):
         """
         remove atoms with the provided atom names
         """
-        atom_indice_to_be_removed = []
-        for i_atom in range(self.num_of_atoms):
-            for atom_name in atom_name_list:
-                if self.atom_name[i_atom] == atom_name:
-                    atom_indice_to_be_removed.append(i_atom)
-                    break
-        num_of_atoms_to_be_removed = len(atom_indice_to_be_removed)
-        for i_atom in range(num_of_atoms_to_be_removed):
-            self.remove_atom_entry(
-                atom_indice_to_be_removed[i_atom] - i_atom
-            )  # shift atom indice to match the shrinkage of atom list
+        self.keep_atom_entries(~_isin_names(self.atom_name, atom_name_list))
 
     def select_atoms(self, regular_expression_pattern):
-        atom_indice_to_be_removed = []
-        for i_atom in range(self.num_of_atoms):
-            if not re.search(regular_expression_pattern, self.atom_name[i_atom]):
-                atom_indice_to_be_removed.append(i_atom)
-
-        num_of_atoms_to_be_removed = len(atom_indice_to_be_removed)
-        for i_atom in range(num_of_atoms_to_be_removed):
-            self.remove_atom_entry(atom_indice_to_be_removed[i_atom] - i_atom)
+        """
+        keep only the atoms whose name matches the regular expression pattern,
+        which is searched once per unique atom name
+        """
+        pattern = re.compile(regular_expression_pattern)
+        unique_names, inverse = np.unique(self.atom_name, return_inverse=True)
+        matched = np.array(
+            [pattern.search(name) is not None for name in unique_names.tolist()], dtype=bool
+        )
+        self.keep_atom_entries(matched[inverse])
 
     def remove_residues(self, residue_name_list):
         """
         remove atoms with the provided residue names
         """
-        atom_indice_to_be_removed = []
-        for i_atom in range(self.num_of_atoms):
-            for residue_name in residue_name_list:
-                if self.residue_name[i_atom] == residue_name:
-                    atom_indice_to_be_removed.append(i_atom)
-                    break
-        num_of_atoms_to_be_removed = len(atom_indice_to_be_removed)
-        for i_atom in range(num_of_atoms_to_be_removed):
-            self.remove_atom_entry(
-                atom_indice_to_be_removed[i_atom] - i_atom
-            )  # shift atom indice to match the shrinkage of atom list
+        self.keep_atom_entries(~_isin_names(self.residue_name, residue_name_list))
 
     # TODO: may add to copy atoms with the providied atom names and residue names
+
+
+def _isin_names(names, name_list):
+    """
+    return the mask of the names found in name_list, testing each unique name once
+    """
+    name_set = set(name_list)
+    unique_names, inverse = np.unique(names, return_inverse=True)
+    return np.array([name in name_set for name in unique_names.tolist()], dtype=bool)[inverse]
+
+
+def _wrap_gro_number(values):
+    """
+    wrap residue and atom numbers above 99999, as GROMACS does when writing gro files
+    """
+    return np.where(values > 99999, values % 100000, values)
+
+
+def _digits_field(magnitudes, width, negative):
+    """
+    right-align the decimal digits of non-negative integers in an (n, width) array of characters,
+    preceded by a minus sign where negative; return None if any of them does not fit
+    """
+    magnitudes = magnitudes.astype(np.int64)
+    num_of_digits = np.ones(len(magnitudes), dtype=np.int64)
+    power = 10
+    while (magnitudes >= power).any():
+        num_of_digits += magnitudes >= power
+        power *= 10
+    if (num_of_digits + negative > width).any():
+        return None
+    field = np.full((len(magnitudes), width), ord(" "), dtype=np.uint8)
+    for position in range(width):
+        exponent = width - 1 - position
+        digit = (magnitudes // 10**exponent) % 10 + ord("0")
+        field[:, position] = np.where(exponent < num_of_digits, digit, field[:, position])
+        field[:, position] = np.where(
+            negative & (exponent == num_of_digits), ord("-"), field[:, position]
+        )
+    return field
+
+
+def _format_int_field(values, width):
+    """
+    format integers as the python %{width}d format into an (n, width) array of characters
+    """
+    return _digits_field(np.abs(values), width, values < 0)
+
+
+def _format_name_field(values, width, left_aligned):
+    """
+    format names as the python %-{width}s or %{width}s format into an (n, width) array of characters;
+    return None if any of them is not ascii or does not fit
+    """
+    if values.dtype.itemsize // 4 > width:
+        if (np.char.str_len(values) > width).any():
+            return None
+        values = values.astype("U%d" % width)
+    # unicode arrays are left-packed UCS4 code points padded with zeros up to the itemsize
+    values = np.ascontiguousarray(values)
+    code_points = np.zeros((len(values), width), dtype=np.uint32)
+    num_of_chars = values.dtype.itemsize // 4
+    code_points[:, :num_of_chars] = values.view(np.uint32).reshape(len(values), num_of_chars)
+    if (code_points > 127).any():
+        return None
+    if not left_aligned:
+        # shift every name right by its padding
+        padding = (code_points == 0).sum(axis=1)
+        source = np.arange(width) - padding[:, np.newaxis]
+        code_points = np.where(
+            source >= 0,
+            np.take_along_axis(code_points, np.maximum(source, 0), axis=1),
+            0,
+        )
+    return np.where(code_points == 0, ord(" "), code_points).astype(np.uint8)
+
+
+def _format_float_field(values, width, decimals):
+    """
+    format floats as the python %{width}.{decimals}f format into an (n, width) array of characters;
+    values close to a rounding tie are formatted by python so that the output is identical
+    """
+    values = values.astype(np.float64)
+    if not np.isfinite(values).all():
+        return None
+    scaled = np.abs(values) * 10**decimals
+    rounded = np.rint(scaled)
+    if (rounded >= 2**63).any():
+        # too large for the integer conversion, let python format them
+        return None
+    integer_part, fractional_part = np.divmod(rounded.astype(np.int64), 10**decimals)
+    integer_field = _digits_field(integer_part, width - decimals - 1, np.signbit(values))
+    if integer_field is None:
+        return None
+    fractional_field = np.empty((len(values), decimals), dtype=np.uint8)
+    for position in range(decimals):
+        fractional_field[:, position] = (
+            fractional_part // 10 ** (decimals - 1 - position)
+        ) % 10 + ord("0")
+    field = np.hstack(
+        (integer_field, np.full((len(values), 1), ord("."), dtype=np.uint8), fractional_field)
+    )
+    for i_value in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6):
+        formatted = ("%*.*f" % (width, decimals, values[i_value])).encode()
+        if len(formatted) != width:
+            return None
+        field[i_value] = np.frombuffer(formatted, dtype=np.uint8)
+    return field
+
+
+def iter_gro_frames(file_name, vectorized=True, float_dtype=FLOAT_DTYPE, keep_raw_lines=False):
+    """
+    iterate over the frames of a single or multi-frame gro file with bounded memory;
+    the same Gro object is yielded for every frame and its column buffers are refilled in place,
+    so copy any column that has to outlive the current frame
+    """
+    gro = Gro(float_dtype=float_dtype)
+    column_buffers = {}
+    with open(file_name, "rb") as file_id:
+        while True:
+            # restore the buffers of the previous frame, the caller may have replaced the columns
+            for column, buffer in column_buffers.items():
+                setattr(gro, column, buffer)
+            if not gro.read_gro_frame(
+                file_id, vectorized=vectorized, reuse_columns=True, keep_raw_lines=keep_raw_lines
+            ):
+                return
+            column_buffers = {column: getattr(gro, column) for column in Gro.COLUMNS}
+            yield gro
@@ -0,0 +1,26 @@
+# type: ignore
+from biobb_common.tools import test_fixtures as fx
+from biobb_structure_utils.utils.closest_residues import ClosestResidues, closest_residues
+
+
+class TestClosestResiduesGroCa():
+    # twice the extent of the largest residue, AQ4, made whole across the box edges
+    max_padding = 25.0
+
+    def setup_class(self):
+        fx.test_setup(self, 'closest_residues_gro_ca')
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+        pass
+
+    def test_launch(self):
+        closest_residues(properties=self.properties, **self.paths)
+        assert fx.not_empty(self.paths['output_residues_path'])
+        assert fx.equal(self.paths['output_residues_path'], self.paths['reference_output_residues_path'])
+
+    def test_padding(self):
+        tool = ClosestResidues(properties=self.properties, **self.paths)
+        tool.stage_io_dict = {"in": {"input_structure_path": self.paths['input_structure_path']}, "out": {}}
+        for _, _, _, padding, _, _ in tool._index_models(tool._read_gro()):
+            assert padding < self.max_padding
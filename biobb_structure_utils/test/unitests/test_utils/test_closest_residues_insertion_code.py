@@ -0,0 +1,34 @@
+# type: ignore
+import json
+from biobb_common.tools import test_fixtures as fx
+from biobb_structure_utils.utils.closest_residues import closest_residues
+
+
+class TestClosestResiduesInsertionCode():
+    def setup_class(self):
+        fx.test_setup(self, 'closest_residues_insertion_code')
+        # residue 62 of chain A becomes residue 61 with insertion code A
+        with open(self.paths['input_structure_path']) as input_pdb:
+            lines = input_pdb.readlines()
+        self.paths['input_structure_path'] = 'insertion_code.pdb'
+        with open(self.paths['input_structure_path'], 'w') as insertion_pdb:
+            for line in lines:
+                if line.startswith(('ATOM', 'HETATM', 'ANISOU', 'TER')) and line[21:27] == 'A  62 ':
+                    line = line[:22] + '  61A' + line[27:]
+                insertion_pdb.write(line)
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+        pass
+
+    def test_launch(self):
+        closest_residues(properties=self.properties, **self.paths)
+        assert fx.not_empty(self.paths['output_residues_path'])
+        with open(self.paths['output_residues_path']) as output_pdb:
+            residues = {line[17:27] for line in output_pdb if line.startswith('ATOM')}
+        assert 'PRO A  61A' in residues
+        assert 'LEU A  61 ' in residues
+        with open(self.paths['output_distances_path']) as distances_json:
+            res_ids = [residue['res_id'] for residue in json.load(distances_json)['residues']]
+        assert res_ids[0] == '61A'
+        assert '61' in res_ids
@@ -0,0 +1,19 @@
+# type: ignore
+from biobb_common.tools import test_fixtures as fx
+from biobb_structure_utils.utils.closest_residues import closest_residues
+
+
+class TestClosestResiduesQueries():
+    def setup_class(self):
+        fx.test_setup(self, 'closest_residues_queries')
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+        pass
+
+    def test_launch(self):
+        closest_residues(properties=self.properties, **self.paths)
+        assert fx.not_empty(self.paths['output_residues_path'])
+        query_output_path = self.properties['queries'][0]['output_residues_path']
+        assert fx.not_empty(query_output_path)
+        assert fx.equal(query_output_path, self.paths['reference_output_residues_path'])
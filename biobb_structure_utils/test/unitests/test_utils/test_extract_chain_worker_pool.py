@@ -0,0 +1,19 @@
+# type: ignore
+from biobb_common.tools import test_fixtures as fx
+from biobb_structure_utils.utils.extract_chain import extract_chain
+from biobb_structure_utils.utils.structure_checking import shutdown_worker_pool
+
+
+class TestExtractChainWorkerPool():
+    def setup_class(self):
+        fx.test_setup(self, 'extract_chain_worker_pool')
+
+    def teardown_class(self):
+        shutdown_worker_pool()
+        fx.test_teardown(self)
+        pass
+
+    def test_launch(self):
+        extract_chain(properties=self.properties, **self.paths)
+        assert fx.not_empty(self.paths['output_structure_path'])
+        assert fx.equal(self.paths['output_structure_path'], self.paths['reference_output_structure_path'])
@@ -0,0 +1,45 @@
+# type: ignore
+import pytest
+from biobb_common.tools import test_fixtures as fx
+from biobb_structure_utils.utils.common import pdb_model_index
+from biobb_structure_utils.utils.extract_model import extract_model
+
+
+class TestExtractModelBareSerial():
+    def setup_class(self):
+        fx.test_setup(self, 'extract_model_bare_serial')
+        # MODEL records without serial number are numbered by their position
+        with open(self.paths['input_structure_path']) as input_pdb:
+            lines = input_pdb.readlines()
+        self.paths['input_structure_path'] = 'bare_serial.pdb'
+        with open(self.paths['input_structure_path'], 'w') as bare_pdb:
+            bare_pdb.writelines('MODEL' + ' ' * 75 + '\n' if line.startswith('MODEL') else line for line in lines)
+        with open('invalid_serial.pdb', 'w') as invalid_pdb:
+            invalid_pdb.writelines('MODEL        A\n' if line.startswith('MODEL        2 ') else line for line in lines)
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+        pass
+
+    def test_launch(self):
+        extract_model(properties=self.properties, **self.paths)
+        assert fx.not_empty(self.paths['output_structure_path'])
+        assert fx.equal(self.paths['output_structure_path'], self.paths['reference_output_structure_path'])
+        with open(self.paths['output_structure_path']) as output_pdb:
+            assert sum(line.startswith('MODEL') for line in output_pdb) == 2
+
+    def test_model_index(self):
+        model_index = pdb_model_index(self.paths['input_structure_path'])
+        assert sorted(model_index, key=int) == [str(model) for model in range(1, len(model_index) + 1)]
+        extract_model(properties=dict(self.properties, use_model_index=True), **self.paths)
+        assert fx.equal(self.paths['output_structure_path'], self.paths['reference_output_structure_path'])
+        with pytest.raises(ValueError, match='MODEL        A'):
+            pdb_model_index('invalid_serial.pdb')
+
+    def test_invalid_serial(self):
+        with pytest.raises(ValueError, match='MODEL        A'):
+            extract_model(
+                input_structure_path='invalid_serial.pdb',
+                output_structure_path=self.paths['output_structure_path'],
+                properties=self.properties,
+            )
@@ -0,0 +1,25 @@
+# type: ignore
+import shutil
+from pathlib import Path
+from biobb_common.tools import test_fixtures as fx
+from biobb_structure_utils.utils.extract_model import extract_model
+
+
+class TestExtractModelIndex():
+    def setup_class(self):
+        fx.test_setup(self, 'extract_model_index')
+        # the model index is saved next to the input, use a copy in the test directory
+        self.paths['input_structure_path'] = shutil.copy(self.paths['input_structure_path'], '.')
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+        pass
+
+    def test_launch(self):
+        extract_model(properties=self.properties, **self.paths)
+        assert fx.not_empty(self.paths['output_structure_path'])
+        assert fx.equal(self.paths['output_structure_path'], self.paths['reference_output_structure_path'])
+        assert Path(self.paths['input_structure_path'] + '.models.json').exists()
+        # a second run reads the models through the saved index
+        extract_model(properties=self.properties, **self.paths)
+        assert fx.equal(self.paths['output_structure_path'], self.paths['reference_output_structure_path'])
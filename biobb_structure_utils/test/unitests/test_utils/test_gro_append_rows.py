@@ -0,0 +1,38 @@
+# type: ignore
+import copy
+from biobb_common.tools import test_fixtures as fx
+from biobb_structure_utils.gro_lib.gro import Gro
+
+
+class TestGroAppendRows():
+    def setup_class(self):
+        fx.test_setup(self, 'gro_append_rows')
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+        pass
+
+    def test_copy_atom_entries(self):
+        gro = Gro()
+        gro.read_gro_file(self.paths['input_gro_path'], keep_raw_lines=True)
+        appended = Gro()
+        appended.raw_line = gro.raw_line[:0]
+        for i_atom in range(gro.num_of_atoms):
+            appended.copy_atom_entry(gro, i_atom)
+        assert appended.num_of_atoms == gro.num_of_atoms
+        for column in Gro.COLUMNS + ('raw_line',):
+            assert (getattr(appended, column) == getattr(gro, column)).all()
+
+    def test_shallow_copy(self):
+        gro = Gro()
+        gro.read_gro_file(self.paths['input_gro_path'])
+        appended = Gro()
+        appended.copy_residue_entry(gro, 1, 'SER')
+        shallow_copy = copy.copy(appended)
+        # both objects append after the same atoms, neither of them may overwrite the other one
+        appended.copy_atom_entry(gro, 20)
+        shallow_copy.copy_atom_entry(gro, 30)
+        appended.copy_atom_entry(gro, 21)
+        assert appended.atom_id[-2:].tolist() == gro.atom_id[20:22].tolist()
+        assert shallow_copy.atom_id[-1] == gro.atom_id[30]
+        assert shallow_copy.num_of_atoms == appended.num_of_atoms - 1
@@ -0,0 +1,25 @@
+# type: ignore
+import numpy as np
+from biobb_common.tools import test_fixtures as fx
+from biobb_structure_utils.gro_lib.gro import Gro
+
+
+class TestGroLargeCoordinates():
+    def setup_class(self):
+        fx.test_setup(self, 'gro_large_coordinates')
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+        pass
+
+    def test_write(self):
+        gro = Gro()
+        gro.read_gro_file(self.paths['input_gro_path'])
+        # values beyond the int64 range can not be formatted column-wise
+        gro.x[0] = 1e19
+        gro.y[1] = -1e19
+        gro.write_gro_file(self.paths['output_gro_path'])
+        with open(self.paths['output_gro_path']) as output_gro:
+            lines = output_gro.readlines()
+        assert lines[2][20:].startswith("%8.3f" % np.float64(gro.x[0]))
+        assert ("%8.3f" % np.float64(gro.y[1])) in lines[3][20:]
@@ -0,0 +1,34 @@
+# type: ignore
+from biobb_common.tools import test_fixtures as fx
+from biobb_structure_utils.gro_lib.gro import Gro
+
+
+class TestGroRawLinesPrecision():
+    def setup_class(self):
+        fx.test_setup(self, 'gro_raw_lines_precision')
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+        pass
+
+    def test_write_modified(self):
+        gro = Gro()
+        gro.read_gro_file(self.paths['input_gro_path'], keep_raw_lines=True)
+        gro.rename_atoms(['H1'], ['HN1'])
+        gro.rename_residues(['ALA'], ['ALX'])
+        gro.write_gro_file(self.paths['output_gro_path'])
+        with open(self.paths['input_gro_path']) as input_gro:
+            input_lines = input_gro.readlines()
+        with open(self.paths['output_gro_path']) as output_gro:
+            output_lines = output_gro.readlines()
+        assert len(output_lines) == len(input_lines)
+        # the modified atoms are formatted at the 5 decimals of the unmodified ones
+        for input_line, output_line in zip(input_lines[2:-1], output_lines[2:-1]):
+            assert output_line[20:] == input_line[20:]
+        assert output_lines[3][10:15] == "  HN1"
+        assert output_lines[-2][5:10] == "ALX  "
+
+        output = Gro()
+        output.read_gro_file(self.paths['output_gro_path'])
+        assert output.precision == 5
+        assert (output.x == gro.x).all()
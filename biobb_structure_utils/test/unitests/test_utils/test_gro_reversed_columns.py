@@ -0,0 +1,27 @@
+# type: ignore
+from biobb_common.tools import test_fixtures as fx
+from biobb_structure_utils.gro_lib.gro import Gro
+
+
+class TestGroReversedColumns():
+    def setup_class(self):
+        fx.test_setup(self, 'gro_reversed_columns')
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+        pass
+
+    def test_write(self):
+        gro = Gro()
+        gro.read_gro_file(self.paths['input_gro_path'])
+        # reversed views of the columns of another Gro object are not contiguous
+        columns = {column: getattr(gro, column)[::-1] for column in Gro.COLUMNS[:7]}
+        reversed_gro = Gro(system_name=gro.system_name, num_of_atoms=gro.num_of_atoms, box=gro.box, **columns)
+        columns['atom_name'][0] = 'X'
+        assert reversed_gro.atom_name[0] == 'O'
+        reversed_gro.write_gro_file(self.paths['output_gro_path'])
+        with open(self.paths['input_gro_path']) as input_gro:
+            input_lines = input_gro.readlines()
+        with open(self.paths['output_gro_path']) as output_gro:
+            output_lines = output_gro.readlines()
+        assert output_lines[2:-1] == input_lines[-2:1:-1]
@@ -0,0 +1,52 @@
+# type: ignore
+import time
+from pathlib import Path
+from biobb_common.tools import test_fixtures as fx
+from biobb_structure_utils.utils.remove_molecules import remove_molecules
+
+
+def write_solvated_pdb(path, num_residues):
+    """solvated system: one ALA atom followed by a water molecule per residue, 9999 residues per chain"""
+    with open(path, 'w') as pdb_file:
+        serial = 0
+        for i_res in range(num_residues):
+            chain, res_id = divmod(i_res, 9999)
+            for record, name, res_name, chains in (('ATOM  ', ' CA ', 'ALA', 'ABCDEFGH'), ('HETATM', ' O  ', 'HOH', 'STUVWXYZ')):
+                serial += 1
+                pdb_file.write('%s%5d %s %3s %s%4d    %8.3f%8.3f%8.3f  1.00  0.00\n' % (
+                    record, serial % 100000, name, res_name, chains[chain], res_id + 1, i_res % 100, i_res % 97, i_res % 89))
+        pdb_file.write('END\n')
+
+
+class TestRemoveMoleculesLarge:
+    num_residues = 20000
+
+    def setup_class(self):
+        fx.test_setup(self, 'remove_molecules_large')
+        write_solvated_pdb(self.paths['input_structure_path'], self.num_residues)
+        # the same system at a quarter of the size, to compare the runtimes of both
+        self.quarter_paths = {
+            key: str(Path(path).with_name('quarter_' + Path(path).name)) for key, path in self.paths.items()
+        }
+        write_solvated_pdb(self.quarter_paths['input_structure_path'], self.num_residues // 4)
+
+    def teardown_class(self):
+        fx.test_teardown(self)
+        pass
+
+    def test_launch(self):
+        remove_molecules(properties=self.properties, **self.paths)
+        assert fx.not_empty(self.paths['output_molecules_path'])
+        with open(self.paths['output_molecules_path']) as output_pdb:
+            atom_lines = [line for line in output_pdb if line.startswith(('ATOM', 'HETATM'))]
+        assert len(atom_lines) == self.num_residues
+        assert all(' HOH ' not in line for line in atom_lines)
+
+    def test_scaling(self):
+        # a linear removal takes about 4 times longer for 4 times the residues, a quadratic one about 16 times
+        runtimes = []
+        for paths in (self.quarter_paths, self.paths):
+            start = time.perf_counter()
+            remove_molecules(properties=self.properties, **paths)
+            runtimes.append(time.perf_counter() - start)
+        assert runtimes[1] < 10 * runtimes[0]
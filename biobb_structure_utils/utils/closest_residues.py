@@ -1,19 +1,63 @@
 #!/usr/bin/env python3
 
 """Module containing the ClosestResidues class and the command line interface."""
+import copy
+import json
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePath
 from typing import Optional
 import Bio.PDB
+import numpy as np
 from biobb_common.generic.biobb_object import BiobbObject
 from biobb_common.tools import file_utils as fu
 from biobb_common.tools.file_utils import launchlogger
 
+from biobb_structure_utils.gro_lib.gro import Gro
 from biobb_structure_utils.utils.common import (
+    MODEL_INDEX_SUFFIX,
+    OUTPUT_BUFFER_SIZE,
+    ResidueSelector,
     _from_string_to_list,
     check_input_path,
+    check_input_path_gro,
     check_output_path,
+    check_output_path_gro,
+    check_output_path_json,
     create_biopython_residue,
     create_output_file,
     create_residues_list,
+    is_valid_gro,
+    pdb_model_index,
+    iter_pdb_lines,
+    read_pdb_coordinates,
+    write_output_lines,
+)
+from biobb_structure_utils.utils.spatial import (
+    CellList,
+    box_vectors,
+    minimum_image,
+    nearest_residues,
+    periodic_images,
+    residue_min_distances,
+    residues_within_cutoff,
+    wrap_coordinates,
+)
+
+SEARCH_MODES = ("atoms", "heavy_atoms", "ca", "side_chain_centroid", "geometric_centre")
+BACKBONE_ATOMS = ("N", "CA", "C", "O", "OXT")
+HYDROGEN_ELEMENTS = ("H", "D")
+# upper bound of the distance of a hydrogen to the heavy atom it is bonded to
+HYDROGEN_PADDING = 1.2
+# GRO coordinates are in nm, the search is done in Ångströms as in PDB files
+NM_TO_ANGSTROM = 10.0
+
+# the input read into arrays: coordinates, residue of every atom, residue dictionaries, atom names and elements,
+# plus the byte offset blocks of the models read from a PDB input, None if it was read whole, or the frames of
+# a GRO input and the box vectors of every frame
+Structure = namedtuple(
+    "Structure",
+    ["blocks", "coords", "atom_residues", "residues", "atom_names", "atom_elements", "frames", "boxes"],
 )
 
 
@@ -24,12 +68,20 @@ class ClosestResidues(BiobbObject):
     | Return all residues that have at least one atom within radius of center from a list of given residues.
 
     Args:
-        input_structure_path (str): Input structure file path. File type: input. `Sample file <https://github.com/bioexcel/biobb_structure_utils/raw/master/biobb_structure_utils/test/data/utils/2vgb.pdb>`_. Accepted formats: pdb (edam:format_1476), pdbqt (edam:format_1476).
-        output_residues_path (str): Output molcules file path. File type: output. `Sample file <https://github.com/bioexcel/biobb_structure_utils/raw/master/biobb_structure_utils/test/reference/utils/ref_closest_residues.pdb>`_. Accepted formats: pdb (edam:format_1476), pdbqt (edam:format_1476).
+        input_structure_path (str): Input structure file path. File type: input. `Sample file <https://github.com/bioexcel/biobb_structure_utils/raw/master/biobb_structure_utils/test/data/utils/2vgb.pdb>`_. Accepted formats: pdb (edam:format_1476), pdbqt (edam:format_1476), gro (edam:format_2033).
+        output_residues_path (str): Output molcules file path. File type: output. `Sample file <https://github.com/bioexcel/biobb_structure_utils/raw/master/biobb_structure_utils/test/reference/utils/ref_closest_residues.pdb>`_. Accepted formats: pdb (edam:format_1476), pdbqt (edam:format_1476), gro (edam:format_2033).
+        output_frequency_path (str) (Optional): Output contact frequency file path, with the fraction of models in which every residue is a neighbour. File type: output. `Sample file <https://github.com/bioexcel/biobb_structure_utils/raw/master/biobb_structure_utils/test/reference/utils/ref_closest_residues_frequency.json>`_. Accepted formats: json (edam:format_3464).
+        output_distances_path (str) (Optional): Output distances file path, with the distance of every neighbour residue to the closest target atom, sorted by distance within every model. File type: output. `Sample file <https://github.com/bioexcel/biobb_structure_utils/raw/master/biobb_structure_utils/test/reference/utils/ref_closest_residues_distances.json>`_. Accepted formats: json (edam:format_3464).
         properties (dic - Python dictionary object containing the tool parameters, not input/output files):
-            * **residues** (*list*) - (None) List of comma separated res_id or list of dictionaries with the name | res_id  | chain | model of the residues to find the closest neighbours. Format: [{"name": "HIS", "res_id": "72", "chain": "A", "model": "1"}].
-            * **radius** (*float*) - (5) Distance in Ångströms to neighbours of the given list of residues.
+            * **residues** (*list*) - (None) List of comma separated res_id or list of dictionaries with the name | res_id  | chain | model of the residues to find the closest neighbours. Format: [{"name": "HIS", "res_id": "72", "chain": "A", "model": "1"}]. Residue ranges, optionally preceded by the chain, are also accepted: "A:10-250".
+            * **radius** (*float*) - (5) Distance in Ångströms to neighbours of the given list of residues. GRO inputs are searched with minimum image distances in the periodic box of every frame, every frame being a model, and their output is a GRO file.
             * **preserve_target** (*bool*) - (True) Whether or not to preserve the target residues in the output structure.
+            * **k_nearest** (*int*) - (None) Number of residues closest to the given list of residues to search in every model, by the minimum distance of their atoms, instead of all the residues within radius. The radius is the initial search distance, enlarged until k residues are found.
+            * **queries** (*list*) - (None) Additional searches answered from the same read of the input and the same spatial index, as in lightweight mode. List of dictionaries with the residues, radius (defaults to the radius property), preserve_target (defaults to the preserve_target property), k_nearest (defaults to the k_nearest property) and output_residues_path of each search. Format: [{"residues": [61], "radius": 8, "output_residues_path": "/path/to/site61.pdb"}].
+            * **num_threads** (*int*) - (1) Number of threads answering the queries, or searching the models of a single search. Every model is searched on its own, so that target residues only get neighbours of their own model.
+            * **search_mode** (*str*) - ("atoms") Points indexed for the search of residues within radius, the candidate residues found are then refined at full atom resolution, so the result does not change. Values: atoms (every atom), heavy_atoms (every atom but the hydrogens), ca (one point per residue, its CA atom), side_chain_centroid (one point per residue, the centroid of its side chain), geometric_centre (one point per residue, the centroid of its atoms). The residues without the selected atoms are represented by their geometric centre.
+            * **lightweight** (*bool*) - (False) Stream the input PDB once into coordinate arrays instead of a Biopython structure, and stream it again to write the lines of the neighbour residues, so memory does not grow with the size of the file. Models are identified by their MODEL serial number and all the alternate locations are searched. The res_id of a residue with a PDB insertion code includes it, ie 61A, so that, unlike with Biopython, residues 61 and 61A are told apart in the selection, the output and the frequency and distance files.
+            * **use_model_index** (*bool*) - (False) In lightweight mode, when every searched residue has a model and no output_frequency_path is given, read only the blocks of those models from their byte offsets, kept in a sidecar index saved next to the input file with the .models.json suffix. The index is built on first use and rebuilt when the size or modification time of the input change. The output then only has the searched models.
             * **remove_tmp** (*bool*) - (True) [WF property] Remove temporal files.
             * **restart** (*bool*) - (False) [WF property] Do not execute if output files exist.
             * **sandbox_path** (*str*) - ("./") [WF property] Parent path to the sandbox directory.
@@ -66,7 +118,13 @@ class ClosestResidues(BiobbObject):
     """
 
     def __init__(
-        self, input_structure_path, output_residues_path, properties=None, **kwargs
+        self,
+        input_structure_path,
+        output_residues_path,
+        output_frequency_path=None,
+        output_distances_path=None,
+        properties=None,
+        **kwargs,
     ) -> None:
         properties = properties or {}
 
@@ -77,13 +135,28 @@ class ClosestResidues(BiobbObject):
         # Input/Output files
         self.io_dict = {
             "in": {"input_structure_path": input_structure_path},
-            "out": {"output_residues_path": output_residues_path},
+            "out": {
+                "output_residues_path": output_residues_path,
+                "output_frequency_path": output_frequency_path,
+                "output_distances_path": output_distances_path,
+            },
         }
+        # every query output is staged and copied to host as the main output
+        for i_query, query in enumerate(properties.get("queries", None) or []):
+            self.io_dict["out"]["query_%d_output_residues_path" % i_query] = query[
+                "output_residues_path"
+            ]
 
         # Properties specific for BB
         self.residues = _from_string_to_list(properties.get("residues", []))
         self.radius = properties.get("radius", 5)
         self.preserve_target = properties.get("preserve_target", True)
+        self.k_nearest = properties.get("k_nearest", None)
+        self.search_mode = properties.get("search_mode", "atoms")
+        self.lightweight = properties.get("lightweight", False)
+        self.use_model_index = properties.get("use_model_index", False)
+        self.queries = properties.get("queries", None) or []
+        self.num_threads = properties.get("num_threads", 1)
         self.properties = properties
 
         # Check the properties
@@ -94,16 +167,38 @@ class ClosestResidues(BiobbObject):
     def launch(self) -> int:
         """Execute the :class:`ClosestResidues <utils.closest_residues.ClosestResidues>` utils.closest_residues.ClosestResidues object."""
 
-        self.io_dict["in"]["input_structure_path"] = check_input_path(
+        # GRO inputs give GRO outputs
+        self.gro_input = is_valid_gro(PurePath(self.io_dict["in"]["input_structure_path"]).suffix[1:])
+        check_input = check_input_path_gro if self.gro_input else check_input_path
+        check_output = check_output_path_gro if self.gro_input else check_output_path
+        self.io_dict["in"]["input_structure_path"] = check_input(
             self.io_dict["in"]["input_structure_path"],
             self.out_log,
             self.__class__.__name__,
         )
-        self.io_dict["out"]["output_residues_path"] = check_output_path(
-            self.io_dict["out"]["output_residues_path"],
-            self.out_log,
-            self.__class__.__name__,
-        )
+        for file_ref in self.io_dict["out"]:
+            if file_ref.endswith("output_residues_path"):
+                self.io_dict["out"][file_ref] = check_output(
+                    self.io_dict["out"][file_ref],
+                    self.out_log,
+                    self.__class__.__name__,
+                )
+        for file_ref in ("output_frequency_path", "output_distances_path"):
+            if self.io_dict["out"][file_ref]:
+                self.io_dict["out"][file_ref] = check_output_path_json(
+                    self.io_dict["out"][file_ref],
+                    self.out_log,
+                    self.__class__.__name__,
+                )
+
+        if self.search_mode not in SEARCH_MODES:
+            fu.log(
+                self.__class__.__name__ + ": Incorrect search_mode %s, exiting" % self.search_mode,
+                self.out_log,
+            )
+            raise SystemExit(
+                self.__class__.__name__ + ": Incorrect search_mode %s" % self.search_mode
+            )
 
         # Setup Biobb
         if self.check_restart():
@@ -113,71 +208,43 @@ class ClosestResidues(BiobbObject):
         # Business code
         # get list of Residues from properties
         list_residues = create_residues_list(self.residues, self.out_log)
+        selector = ResidueSelector(list_residues)
 
-        # load input into BioPython structure
-        structure = Bio.PDB.PDBParser(QUIET=True).get_structure(
-            "structure", self.stage_io_dict["in"]["input_structure_path"]
-        )
+        if self.queries:
+            self._search_queries(selector)
+        else:
+            self._search_single(selector)
 
-        str_residues = []
-        # format selected residues
-        for residue in structure.get_residues():
-            r = create_biopython_residue(residue)
-            if list_residues:
-                for res in list_residues:
-                    match = True
-                    for code in res["code"]:
-                        if res[code].strip() != r[code].strip():
-                            match = False
-                            break
-                    if match:
-                        str_residues.append(r)
-            else:
-                str_residues.append(r)
-
-        # get target residues in BioPython format
-        target_residues = []
-        for sr in str_residues:
-            # try for residues, if exception, try as HETATM
-            try:
-                target_residues.append(
-                    structure[int(sr["model"]) - 1][sr["chain"]][int(sr["res_id"])]
-                )
-            except KeyError:
-                target_residues.append(
-                    structure[int(sr["model"]) - 1][sr["chain"]][
-                        "H_" + sr["name"], int(sr["res_id"]), " "
-                    ]
-                )
-            except Exception:
-                fu.log(
-                    self.__class__.__name__ + ": Unable to find residue %s",
-                    sr["res_id"],
-                    self.out_log,
-                )
+        self.return_code = 0
 
-        # get all atoms from target_residues
-        target_atoms = Bio.PDB.Selection.unfold_entities(target_residues, "A")
-        # get all atoms of input structure
-        all_atoms = Bio.PDB.Selection.unfold_entities(structure, "A")
-        # generate NeighborSearch object
-        ns = Bio.PDB.NeighborSearch(all_atoms)
-        # set comprehension list
-        nearby_residues = {
-            res
-            for center_atom in target_atoms
-            for res in ns.search(center_atom.coord, self.radius, "R")
-        }
+        # Copy files to host
+        self.copy_to_host()
+
+        # Remove temporal files
+        self.remove_tmp_files()
 
-        # format nearby residues to pure python objects
-        neighbor_residues = []
-        for residue in nearby_residues:
-            r = create_biopython_residue(residue)
-            neighbor_residues.append(r)
+        self.check_arguments(output_files_created=True, raise_exception=False)
 
-        # if preserve_target == False, don't add the residues of self.residues to the final structure
-        if not self.preserve_target:
-            neighbor_residues = [x for x in neighbor_residues if x not in str_residues]
+        return self.return_code
+
+    def _search_single(self, selector):
+        """Answers the search of the residues property, writing the output_residues_path"""
+        if self.gro_input:
+            structure = self._read_gro()
+        elif self.lightweight:
+            structure = self._read_lightweight([selector])
+        else:
+            structure = self._read_biopython()
+        neighbor_residues, model_neighbors, model_distances = self._search(
+            structure,
+            selector,
+            self.radius,
+            self.preserve_target,
+            self.k_nearest,
+            self._index_models(structure),
+            self.num_threads,
+            bool(self.stage_io_dict["out"].get("output_distances_path")),
+        )
 
         fu.log("Found %d nearby residues" % len(neighbor_residues), self.out_log)
 
@@ -190,30 +257,440 @@ class ClosestResidues(BiobbObject):
                 self.__class__.__name__ + ": No neighbour residues found, exiting"
             )
 
-        create_output_file(
-            0,
-            self.stage_io_dict["in"]["input_structure_path"],
-            neighbor_residues,
-            self.stage_io_dict["out"]["output_residues_path"],
-            self.out_log,
+        self._write_frequency(structure, model_neighbors)
+        self._write_distances(structure, model_neighbors, model_distances)
+        if self.gro_input or self.lightweight:
+            # the residues are selected from the arrays, without parsing the input again
+            self._write_arrays(
+                structure,
+                neighbor_residues,
+                model_neighbors,
+                self.stage_io_dict["out"]["output_residues_path"],
+            )
+        else:
+            create_output_file(
+                0,
+                self.stage_io_dict["in"]["input_structure_path"],
+                neighbor_residues,
+                self.stage_io_dict["out"]["output_residues_path"],
+                self.out_log,
+            )
+
+    def _read_biopython(self):
+        """Returns the atom coordinates, the residue index of every atom, the residue dictionaries and the atom
+        names and elements of the input, loaded into a Biopython structure"""
+        structure = Bio.PDB.PDBParser(QUIET=True).get_structure(
+            "structure", self.stage_io_dict["in"]["input_structure_path"]
+        )
+        all_residues = list(structure.get_residues())
+        coords = []
+        atom_residues = []
+        atom_names = []
+        atom_elements = []
+        for i_residue, residue in enumerate(all_residues):
+            for atom in residue:
+                coords.append(atom.coord)
+                atom_residues.append(i_residue)
+                atom_names.append(atom.get_id())
+                atom_elements.append(atom.element.upper())
+        return Structure(
+            None,
+            np.array(coords, dtype=np.float64).reshape(-1, 3),
+            np.array(atom_residues, dtype=np.intp),
+            [create_biopython_residue(residue) for residue in all_residues],
+            np.array(atom_names, dtype=str),
+            np.array(atom_elements, dtype=str),
+            None,
+            None,
         )
 
-        self.return_code = 0
+    def _read_lightweight(self, selectors):
+        """Returns the blocks of the models read, the atom coordinates, the residue index of every atom, the
+        residue dictionaries and the atom names and elements of the input, streamed once into arrays by
+        read_pdb_coordinates"""
+        blocks = self._read_indexed_models(selectors) if self.use_model_index else None
+        coords, atom_residues, residue_keys, atom_names, atom_elements = read_pdb_coordinates(
+            self.stage_io_dict["in"]["input_structure_path"], blocks
+        )
+        residues = [dict(zip(("model", "chain", "res_id", "name"), key)) for key in residue_keys]
+        return Structure(
+            blocks, coords, atom_residues, residues, atom_names, atom_elements, None, None
+        )
 
-        # Copy files to host
-        self.copy_to_host()
+    def _read_indexed_models(self, selectors):
+        """Returns the byte offset blocks of the models the selectors are restricted to, found in the model
+        index of the input, or None if the whole input has to be read"""
+        if self.stage_io_dict["out"].get("output_frequency_path"):
+            # the frequencies are computed over every model
+            return None
+        models = set()
+        for selector in selectors:
+            selector_models = selector.models()
+            if selector_models is None:
+                return None
+            models.update(selector_models)
+        model_index = pdb_model_index(
+            self.stage_io_dict["in"]["input_structure_path"],
+            self.io_dict["in"]["input_structure_path"] + MODEL_INDEX_SUFFIX,
+            self.out_log,
+        )
+        if not models or not models.issubset(model_index):
+            return None
+        fu.log("Reading models %s through the model index" % ", ".join(sorted(models)), self.out_log)
+        return [model_index[model] for model in models]
+
+    def _read_gro(self):
+        """Returns the atom coordinates in Ångströms wrapped into the periodic box, the residue index of every
+        atom, the residue dictionaries and the atom names and elements of every frame of the GRO input, one
+        model per frame, with the frames themselves and their box vectors"""
+        frames = []
+        with open(self.stage_io_dict["in"]["input_structure_path"], "rb") as file_id:
+            frame = Gro()
+            # the atom lines are kept to write the selected atoms back verbatim
+            while frame.read_gro_frame(file_id, keep_raw_lines=True):
+                frames.append(frame)
+                frame = Gro()
+        coords = []
+        atom_residues = []
+        residues = []
+        boxes = []
+        for i_frame, frame in enumerate(frames):
+            frame_coords = np.column_stack((frame.x, frame.y, frame.z)) * NM_TO_ANGSTROM
+            vectors = box_vectors(frame.box)
+            if vectors is not None:
+                vectors = vectors * NM_TO_ANGSTROM
+                frame_coords = wrap_coordinates(frame_coords, vectors)
+            coords.append(frame_coords)
+            boxes.append(vectors)
+            index = frame.residue_index()
+            atom_residues.append(
+                np.repeat(np.arange(len(residues), len(residues) + len(index.start)), index.end - index.start)
+            )
+            residues.extend(
+                {"model": str(i_frame + 1), "chain": " ", "res_id": str(res_id), "name": name}
+                for res_id, name in zip(index.residue_id.tolist(), index.residue_name.tolist())
+            )
+        atom_names = np.concatenate([frame.atom_name for frame in frames]) if frames else np.empty(0, dtype=str)
+        # GRO files have no element column, it is the first letter of the atom name
+        atom_elements = np.char.upper(
+            np.array([name.lstrip("0123456789")[:1] for name in atom_names.tolist()], dtype=str)
+        )
+        return Structure(
+            None,
+            np.concatenate(coords) if coords else np.empty((0, 3)),
+            np.concatenate(atom_residues).astype(np.intp) if atom_residues else np.empty(0, dtype=np.intp),
+            residues,
+            atom_names,
+            atom_elements,
+            frames,
+            boxes,
+        )
 
-        # Remove temporal files
-        self.remove_tmp_files()
+    def _index_models(self, structure, cell_size=None):
+        """Splits the atoms by model, returning for every model in order of appearance its atom indices, the
+        points indexed by search_mode and their residues, the padding of the search of candidate residues
+        among those points, the CellList of the points to reuse in several searches if cell_size is given and
+        the box vectors of the model if it is periodic"""
+        residues, atom_residues = structure.residues, structure.atom_residues
+        model_codes = {}
+        residue_models = np.array(
+            [model_codes.setdefault(r["model"], len(model_codes)) for r in residues], dtype=np.intp
+        )
+        atom_models = residue_models[atom_residues]
+        atom_order = np.argsort(atom_models, kind="stable")
+        model_atoms = np.split(atom_order, np.cumsum(np.bincount(atom_models, minlength=len(model_codes)))[:-1])
+        model_index = []
+        for i_model, atoms in enumerate(model_atoms):
+            vectors = structure.boxes[i_model] if structure.boxes else None
+            points, point_residues, padding = self._index_points(structure, atoms, vectors)
+            cell_list = None if cell_size is None else CellList(points, cell_size + padding)
+            model_index.append((atoms, points, point_residues, padding, cell_list, vectors))
+        return model_index
+
+    def _index_points(self, structure, atoms, vectors=None):
+        """Returns the points indexed by search_mode for the given atoms, the residue of every point and the
+        padding of the search distance that finds all the residues with atoms within the search distance;
+        in a periodic box of the given vectors the residue points are computed on the residues made whole"""
+        coords, atom_residues = structure.coords, structure.atom_residues
+        atom_names, atom_elements = structure.atom_names, structure.atom_elements
+        if self.search_mode == "atoms":
+            return coords[atoms], atom_residues[atoms], 0.0
+        if self.search_mode == "heavy_atoms":
+            hydrogen = np.isin(atom_elements[atoms], HYDROGEN_ELEMENTS)
+            hydrogen_atoms = atoms[hydrogen]
+            heavy_atoms = atoms[~hydrogen]
+            heavy_atoms = heavy_atoms[np.argsort(atom_residues[heavy_atoms], kind="stable")]
+            heavy_residues = atom_residues[heavy_atoms]
+            # every hydrogen against every heavy atom of its residue
+            starts = np.searchsorted(heavy_residues, atom_residues[hydrogen_atoms], side="left")
+            counts = np.searchsorted(heavy_residues, atom_residues[hydrogen_atoms], side="right") - starts
+            pair_starts = np.cumsum(counts) - counts
+            pair_hydrogens = np.repeat(np.arange(len(hydrogen_atoms)), counts)
+            pair_heavy = np.repeat(starts - pair_starts, counts) + np.arange(counts.sum())
+            squared = (
+                (coords[hydrogen_atoms[pair_hydrogens]] - coords[heavy_atoms[pair_heavy]]) ** 2
+            ).sum(axis=1)
+            nearest = np.full(len(hydrogen_atoms), np.inf)
+            np.minimum.at(nearest, pair_hydrogens, squared)
+            # the hydrogens without a heavy atom of their residue closer than HYDROGEN_PADDING, as the ones of
+            # an H2 molecule or of a molecule broken by the periodic boundary conditions, are indexed too
+            indexed_mask = ~hydrogen
+            indexed_mask[hydrogen] = nearest > HYDROGEN_PADDING * HYDROGEN_PADDING
+            indexed = atoms[indexed_mask]
+            return coords[indexed], atom_residues[indexed], 2 * HYDROGEN_PADDING
+
+        # one point per residue, padded by the largest distance from a point to the atoms of its residue
+        residues, first_atoms, atom_positions = np.unique(
+            atom_residues[atoms], return_index=True, return_inverse=True
+        )
+        atom_positions = atom_positions.ravel()
+        atom_coords = coords[atoms]
+        if vectors is not None:
+            # residues split by the box edges are made whole around their first atom, so that their points
+            # and extents do not span the box
+            origins = atom_coords[first_atoms][atom_positions]
+            atom_coords = origins + minimum_image(atom_coords - origins, vectors)
+        points = np.zeros((len(residues), 3))
+        np.add.at(points, atom_positions, atom_coords)
+        points /= np.bincount(atom_positions, minlength=len(residues))[:, np.newaxis]
+        if self.search_mode != "geometric_centre":
+            if self.search_mode == "ca":
+                selected = atom_names[atoms] == "CA"
+            else:
+                selected = ~np.isin(atom_names[atoms], BACKBONE_ATOMS)
+            selected_points = np.zeros((len(residues), 3))
+            np.add.at(selected_points, atom_positions[selected], atom_coords[selected])
+            selected_counts = np.bincount(atom_positions[selected], minlength=len(residues))
+            represented = selected_counts > 0
+            points[represented] = selected_points[represented] / selected_counts[represented, np.newaxis]
+        extents = np.zeros(len(residues))
+        np.maximum.at(extents, atom_positions, np.linalg.norm(atom_coords - points[atom_positions], axis=1))
+        if vectors is not None:
+            points = wrap_coordinates(points, vectors)
+        return points, residues, 2 * extents.max() if len(extents) else 0.0
+
+    def _search(
+        self,
+        structure,
+        selector,
+        radius,
+        preserve_target,
+        k_nearest,
+        model_index,
+        num_threads=1,
+        with_distances=False,
+    ):
+        """Returns the residues within radius, or the k_nearest residues, of the ones matched by selector, and
+        the residue indices found in every model with their distances if with_distances is set; every
+        model is searched on its own, in parallel threads, so that the target residues of a model only get
+        neighbours in the same model"""
+        coords, atom_residues, residues = structure.coords, structure.atom_residues, structure.residues
+        target = np.array([selector.matches(r) for r in residues], dtype=bool)
+
+        def search_model(model):
+            atoms, points, point_residues, padding, cell_list, vectors = model
+            target_atoms = target[atom_residues[atoms]]
+            target_coords = coords[atoms[target_atoms]]
+            target_points = points[target[point_residues]]
+            if vectors is not None:
+                # the periodic images of the targets find the neighbours across the box edges
+                target_coords = periodic_images(target_coords, vectors)
+                target_points = periodic_images(target_points, vectors)
+            if k_nearest:
+                # the k residues are searched among the ones that are not targets
+                other_atoms = atoms[~target_atoms]
+                neighbors, distances = nearest_residues(
+                    coords[other_atoms], atom_residues[other_atoms], target_coords, k_nearest, radius
+                )
+                if preserve_target:
+                    targets = np.unique(atom_residues[atoms[target_atoms]])
+                    neighbors = np.concatenate((targets, neighbors))
+                    distances = np.concatenate((np.zeros(len(targets)), distances))
+                return neighbors, distances
+            search_atoms = atoms
+            if padding:
+                # the candidate residues found among the indexed points are refined with all their atoms
+                candidates = residues_within_cutoff(
+                    points,
+                    point_residues,
+                    target_points,
+                    radius + padding,
+                    cell_list=cell_list,
+                )
+                candidate = np.zeros(len(residues), dtype=bool)
+                candidate[candidates] = True
+                search_atoms = atoms[candidate[atom_residues[atoms]]]
+                cell_list = CellList(coords[search_atoms], radius)
+            if with_distances:
+                neighbors, distances = residue_min_distances(
+                    coords[search_atoms], atom_residues[search_atoms], target_coords, radius
+                )
+                within = np.isfinite(distances)
+                neighbors, distances = neighbors[within], distances[within]
+            else:
+                neighbors = residues_within_cutoff(
+                    coords[search_atoms], atom_residues[search_atoms], target_coords, radius, cell_list=cell_list
+                )
+                distances = None
+            # if preserve_target == False, don't add the residues of self.residues to the final structure
+            if not preserve_target:
+                kept = ~target[neighbors]
+                neighbors = neighbors[kept]
+                distances = None if distances is None else distances[kept]
+            return neighbors, distances
+
+        with ThreadPoolExecutor(max_workers=max(1, num_threads)) as executor:
+            model_results = list(executor.map(search_model, model_index))
+        model_neighbors = [neighbors for neighbors, _ in model_results]
+        model_distances = [distances for _, distances in model_results]
+        neighbor_residues = [
+            residues[i_residue] for neighbors in model_neighbors for i_residue in neighbors
+        ]
+        return neighbor_residues, model_neighbors, model_distances
+
+    def _write_frequency(self, structure, model_neighbors):
+        """Writes to output_frequency_path, if given, the fraction of models in which every residue
+        (chain, res_id, name) is a neighbour"""
+        output_path = self.stage_io_dict["out"].get("output_frequency_path")
+        if not output_path:
+            return
+        residues = structure.residues
+        contacts = {}
+        for neighbors in model_neighbors:
+            for i_residue in neighbors:
+                r = residues[i_residue]
+                contact = contacts.setdefault(
+                    (r["chain"], r["res_id"], r["name"]),
+                    {"chain": r["chain"], "res_id": r["res_id"], "name": r["name"], "models": 0},
+                )
+                contact["models"] += 1
+        num_models = len(model_neighbors)
+        for contact in contacts.values():
+            contact["frequency"] = round(contact["models"] / num_models, 4)
+        fu.log("Writting contact frequency to: %s" % output_path, self.out_log)
+        with open(output_path, "w") as outfile:
+            json.dump({"num_models": num_models, "residues": list(contacts.values())}, outfile, indent=4)
+
+    def _write_distances(self, structure, model_neighbors, model_distances):
+        """Writes to output_distances_path, if given, the distance of every neighbour residue to the closest
+        target atom, sorted by distance within every model"""
+        output_path = self.stage_io_dict["out"].get("output_distances_path")
+        if not output_path:
+            return
+        residues = structure.residues
+        neighbor_distances = []
+        for neighbors, distances in zip(model_neighbors, model_distances):
+            for i_neighbor in np.argsort(distances, kind="stable"):
+                r = residues[neighbors[i_neighbor]]
+                neighbor_distances.append(
+                    {
+                        "model": r["model"],
+                        "chain": r["chain"],
+                        "res_id": r["res_id"],
+                        "name": r["name"],
+                        "distance": round(float(distances[i_neighbor]), 3),
+                    }
+                )
+        fu.log("Writting distances to: %s" % output_path, self.out_log)
+        with open(output_path, "w") as outfile:
+            json.dump({"residues": neighbor_distances}, outfile, indent=4)
+
+    def _write_arrays(self, structure, neighbor_residues, model_neighbors, output_path):
+        """Writes the neighbour residues of the input read into arrays: the lines of the blocks of a PDB input
+        streamed again, or every frame of a GRO input, already in memory, with the atoms of its neighbour
+        residues"""
+        if structure.frames is None:
+            fu.log("Writting pdb to: %s" % output_path, self.out_log)
+            with open(output_path, "w", buffering=OUTPUT_BUFFER_SIZE) as outfile:
+                write_output_lines(
+                    0,
+                    iter_pdb_lines(self.stage_io_dict["in"]["input_structure_path"], structure.blocks),
+                    neighbor_residues,
+                    outfile,
+                )
+            return
+        fu.log("Writting gro to: %s" % output_path, self.out_log)
+        selected = np.zeros(len(structure.residues), dtype=bool)
+        for neighbors in model_neighbors:
+            selected[neighbors] = True
+        atom_selected = selected[structure.atom_residues]
+        frame_start = 0
+        with open(output_path, "w", buffering=OUTPUT_BUFFER_SIZE) as outfile:
+            for frame in structure.frames:
+                # the frame is shared by all the searches, the selection is done on a shallow copy
+                selection = copy.copy(frame)
+                selection.keep_atom_entries(atom_selected[frame_start:frame_start + frame.num_of_atoms])
+                selection.write_gro_frame(outfile)
+                frame_start += frame.num_of_atoms
+
+    def _search_queries(self, selector):
+        """Answers the main search and every query from a single read of the input and a single cell list
+        of the atoms of every model, writing one output per search"""
+        searches = [
+            (
+                selector,
+                self.radius,
+                self.preserve_target,
+                self.k_nearest,
+                self.stage_io_dict["out"]["output_residues_path"],
+            )
+        ]
+        for i_query, query in enumerate(self.queries):
+            searches.append(
+                (
+                    ResidueSelector(
+                        create_residues_list(
+                            _from_string_to_list(query.get("residues", [])), self.out_log
+                        )
+                    ),
+                    query.get("radius", self.radius),
+                    query.get("preserve_target", self.preserve_target),
+                    query.get("k_nearest", self.k_nearest),
+                    self.stage_io_dict["out"]["query_%d_output_residues_path" % i_query],
+                )
+            )
+        if self.gro_input:
+            structure = self._read_gro()
+        else:
+            structure = self._read_lightweight([search[0] for search in searches])
+        model_index = self._index_models(
+            structure, max(radius for _, radius, _, _, _ in searches)
+        )
 
-        self.check_arguments(output_files_created=True, raise_exception=False)
+        # the distances are written for the main search only
+        main_distances = bool(self.stage_io_dict["out"].get("output_distances_path"))
+
+        def answer(search):
+            search_selector, radius, preserve_target, k_nearest, output_path = search
+            with_distances = main_distances and search is searches[0]
+            neighbor_residues, model_neighbors, model_distances = self._search(
+                structure,
+                search_selector,
+                radius,
+                preserve_target,
+                k_nearest,
+                model_index,
+                with_distances=with_distances,
+            )
+            # an empty output is written for the searches without neighbours so that the batch goes on
+            fu.log(
+                "Found %d nearby residues for %s" % (len(neighbor_residues), output_path),
+                self.out_log,
+            )
+            self._write_arrays(structure, neighbor_residues, model_neighbors, output_path)
+            return model_neighbors, model_distances
 
-        return self.return_code
+        with ThreadPoolExecutor(max_workers=max(1, self.num_threads)) as executor:
+            all_results = list(executor.map(answer, searches))
+        self._write_frequency(structure, all_results[0][0])
+        self._write_distances(structure, *all_results[0])
 
 
 def closest_residues(
     input_structure_path: str,
     output_residues_path: str,
+    output_frequency_path: Optional[str] = None,
+    output_distances_path: Optional[str] = None,
     properties: Optional[dict] = None,
     **kwargs,
 ) -> int:
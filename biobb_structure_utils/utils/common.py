@@ -1,14 +1,29 @@
 """Common functions and constants for package biobb_structure_utils.utils"""
 
+import json
+import os
+import re
+from collections import Counter
 from collections.abc import Mapping
 from pathlib import Path, PurePath
 from typing import Optional, Union
 
+import numpy as np
 from biobb_common.tools import file_utils as fu
 
 PDB_COORD_RECORDS = ["MODEL", "ANISOU", "HETATM", "ATOM", "TER", "ENDMDL"]
 PDB_SERIAL_RECORDS = ["ANISOU", "HETATM", "ATOM", "TER"]
 PDB_WATERS = ["SOL", "HOH", "WAT", "T3P"]
+# write buffer of the output files created line by line
+OUTPUT_BUFFER_SIZE = 8 * 1024 * 1024
+# number of atom records parsed at once by read_pdb_coordinates
+READ_CHUNK_SIZE = 65536
+# fields of the residue dictionaries created by create_biopython_residue
+RESIDUE_FIELDS = ["name", "res_id", "chain", "model"]
+RES_ID_RANGE = re.compile(r"^\s*(-?\d+)\s*-\s*(-?\d+)\s*$")
+RES_ID_NUMBER = re.compile(r"\s*-?\d+")
+# sidecar file with the byte offsets of the models of a PDB file, see pdb_model_index
+MODEL_INDEX_SUFFIX = ".models.json"
 
 
 def check_input_path(path, out_log, classname):
@@ -31,6 +46,26 @@ def check_input_path(path, out_log, classname):
     return path
 
 
+def check_input_path_gro(path, out_log, classname):
+    """Checks input GRO file path"""
+    if not Path(path).exists():
+        fu.log(classname + ": Unexisting input file, exiting", out_log)
+        raise SystemExit(classname + ": Unexisting input file")
+    file_extension = PurePath(path).suffix
+    if not is_valid_gro(file_extension[1:]):
+        fu.log(
+            classname + ": Format %s in input file is not compatible" % file_extension[1:],
+            out_log,
+        )
+        raise SystemExit(
+            classname + ": Format %s in input file is not compatible" % file_extension[1:]
+        )
+    # if file input has no path, add cwd because execution is launched on tmp folder
+    if PurePath(path).name == path or not PurePath(path).is_absolute():
+        path = str(PurePath(Path.cwd()).joinpath(path))
+    return path
+
+
 def check_output_path(path, out_log, classname):
     """Checks output file path"""
     if PurePath(path).parent and not Path(PurePath(path).parent).exists():
@@ -48,6 +83,23 @@ def check_output_path(path, out_log, classname):
     return path
 
 
+def check_output_path_gro(path, out_log, classname):
+    """Checks output GRO file path"""
+    if PurePath(path).parent and not Path(PurePath(path).parent).exists():
+        fu.log(classname + ": Unexisting output folder, exiting", out_log)
+        raise SystemExit(classname + ": Unexisting output folder")
+    file_extension = PurePath(path).suffix
+    if not is_valid_gro(file_extension[1:]):
+        fu.log(
+            classname + ": Format %s in output file is not compatible" % file_extension[1:],
+            out_log,
+        )
+        raise SystemExit(
+            classname + ": Format %s in output file is not compatible" % file_extension[1:]
+        )
+    return path
+
+
 def check_output_path_pdbqt(path, out_log, classname):
     """Checks output file path"""
     if PurePath(path).parent and not Path(PurePath(path).parent).exists():
@@ -94,6 +146,12 @@ def is_valid_pdbqt(ext):
     return ext in formats
 
 
+def is_valid_gro(ext):
+    """Checks if is a valid GRO file"""
+    formats = ["gro"]
+    return ext in formats
+
+
 def is_valid_json(ext):
     """Checks if is a valid JSON file"""
     formats = ["json"]
@@ -118,49 +176,203 @@ def check_output_end(structure, out_log):
 
 
 def create_output_file(type, input, residues, output, out_log):
-    # parse PDB file and get residues line by line
-    new_file_lines = []
+    fu.log("Writting pdb to: %s" % (output), out_log)
+
+    # parse PDB file and write the residues line by line as they are found
+    with open(input) as infile, open(
+        output, "w", buffering=OUTPUT_BUFFER_SIZE
+    ) as outfile:
+        write_output_lines(type, infile, residues, outfile)
+
+
+def write_output_lines(type, lines, residues, outfile):
+    """Writes the lines of the residues of a PDB file, read from any iterable of lines, to an open file"""
+    # index the selected residues, a residue listed n times has its lines written n times
+    selected_residues = Counter(residue_key(nstr) for nstr in residues)
     curr_model = 0
-    with open(input) as infile:
+    num_models = 0
+    for line in lines:
+        if line.startswith("MODEL   "):
+            num_models += 1
+            curr_model = pdb_model_number(line, num_models)
+            if num_models > 1:
+                outfile.write("ENDMDL\n")
+            outfile.write("MODEL     " + "{:>4}".format(curr_model) + "\n")
+
+        conditional_atoms = [
+            (line.startswith("ATOM") or line.startswith("HETATM")),
+            line.startswith("HETATM"),
+            line.startswith("ATOM"),
+        ]
+
+        if conditional_atoms[type]:
+            for _ in range(selected_residues[pdb_line_residue_key(line, curr_model)]):
+                outfile.write(line)
+
+    if num_models > 0:
+        outfile.write("ENDMDL\n")
+
+
+def pdb_model_number(line, num_models):
+    """Model number (str) of a MODEL record: its serial number or, if it has none, num_models, the number of
+    MODEL records read so far including this one; raises ValueError naming the record if the serial is not a
+    number"""
+    fields = line[6:].split()
+    if not fields:
+        return str(num_models)
+    try:
+        int(fields[0])
+    except ValueError:
+        raise ValueError("Invalid serial number in PDB record: %s" % line.rstrip("\r\n")) from None
+    return fields[0]
+
+
+def pdb_line_residue_key(line, curr_model):
+    """Residue key (model, chain, res_id, name) of a PDB ATOM/HETATM line, curr_model is 0 before any MODEL"""
+    name = line[17:20].strip()
+    chain = line[21:22].strip()
+    res_id = line[22:27].strip()
+    if curr_model != 0:
+        model = curr_model
+    else:
+        model = "1"
+    if chain == "":
+        chain = " "
+    return (model, chain, res_id, name)
+
+
+def pdb_line_element(line):
+    """Element of an ATOM/HETATM line, from its element columns or else from the first letter of its atom name"""
+    element = line[76:78].strip()
+    if not element:
+        element = line[12:16].strip().lstrip("0123456789")[:1]
+    return element.upper()
+
+
+def read_pdb_coordinates(input, blocks=None):
+    """Reads a PDB file in a single streamed pass into arrays: the coordinates of its ATOM/HETATM records,
+    the index of their residue in the list of residue keys (model, chain, res_id, name) and their atom names
+    and elements; if blocks is given, only those (start, end) byte offset blocks of the file are read. The
+    lines themselves are not kept, stream them again with iter_pdb_lines to write them
+
+    Returns:
+        tuple: N x 3 coordinates, N residue indices, residue keys, N atom names and N elements.
+    """
+    chunks = []
+    residue_index = {}
+    curr_model = 0
+    num_models = 0
+    atom_lines = []
+    for line in iter_pdb_lines(input, blocks):
+        if line.startswith("MODEL   "):
+            num_models += 1
+            curr_model = pdb_model_number(line, num_models)
+        elif line.startswith("ATOM") or line.startswith("HETATM"):
+            atom_lines.append((line, curr_model))
+            if len(atom_lines) == READ_CHUNK_SIZE:
+                chunks.append(_parse_pdb_atom_lines(atom_lines, residue_index))
+                atom_lines = []
+    chunks.append(_parse_pdb_atom_lines(atom_lines, residue_index))
+    coords, atom_residues, atom_names, atom_elements = (
+        np.concatenate(column) for column in zip(*chunks)
+    )
+    return coords, atom_residues, list(residue_index), atom_names, atom_elements
+
+
+def _parse_pdb_atom_lines(atom_lines, residue_index):
+    """Parses a chunk of (ATOM/HETATM line, model) pairs into arrays, adding their new residue keys to
+    residue_index; returns their coordinates, residue indices, atom names and elements"""
+    coords = np.empty((len(atom_lines), 3), dtype=np.float64)
+    atom_residues = np.empty(len(atom_lines), dtype=np.intp)
+    for i_atom, (line, curr_model) in enumerate(atom_lines):
+        key = pdb_line_residue_key(line, curr_model)
+        atom_residues[i_atom] = residue_index.setdefault(key, len(residue_index))
+        coords[i_atom] = (float(line[30:38]), float(line[38:46]), float(line[46:54]))
+    return (
+        coords,
+        atom_residues,
+        np.array([line[12:16].strip() for line, _ in atom_lines], dtype="U4"),
+        np.array([pdb_line_element(line) for line, _ in atom_lines], dtype="U2"),
+    )
+
+
+def iter_pdb_lines(input, blocks=None):
+    """Yields the lines of a PDB file, or only the lines of its (start, end) byte offset blocks, in file order"""
+    if blocks is None:
+        with open(input) as infile:
+            yield from infile
+        return
+    with open(input, "rb") as infile:
+        for start, end in sorted(blocks):
+            infile.seek(start)
+            offset = start
+            while offset < end:
+                line = infile.readline()
+                if not line:
+                    break
+                offset += len(line)
+                yield line.decode()
+
+
+def pdb_model_index(input, index_path=None, out_log=None):
+    """Byte offsets of the MODEL/ENDMDL blocks of a PDB file, read from the sidecar index_path, by default the
+    input path followed by MODEL_INDEX_SUFFIX, when it was built for a file of the same size and modification
+    time; otherwise the offsets are found in one pass over the file and saved to index_path
+
+    Returns:
+        dict: model number (str) -> (start, end) byte offsets of its block, MODEL and ENDMDL lines included.
+    """
+    index_path = index_path or input + MODEL_INDEX_SUFFIX
+    stat = os.stat(input)
+    models = None
+    try:
+        with open(index_path) as index_file:
+            index = json.load(index_file)
+        if index["size"] == stat.st_size and index["mtime_ns"] == stat.st_mtime_ns:
+            models = index["models"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    if models is None:
+        fu.log("Building model index %s" % index_path, out_log)
+        models = _find_pdb_models(input)
+        try:
+            with open(index_path, "w") as index_file:
+                json.dump({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "models": models}, index_file)
+        except OSError:
+            fu.log("Model index %s could not be saved" % index_path, out_log)
+
+    model_index = {}
+    for model, start, end in models:
+        # the first block of a repeated model number is the one found by a sequential reader
+        model_index.setdefault(model, (start, end))
+    return model_index
+
+
+def _find_pdb_models(input):
+    """Model number and byte offsets of every MODEL/ENDMDL block of a PDB file, in file order"""
+    models = []
+    start = None
+    offset = 0
+    num_models = 0
+    with open(input, "rb") as infile:
         for line in infile:
-            if line.startswith("MODEL   "):
-                curr_model = line.rstrip()[-1]
-                if int(curr_model) > 1:
-                    new_file_lines.append("ENDMDL\n")
-                new_file_lines.append("MODEL     " + "{:>4}".format(curr_model) + "\n")
-
-            conditional_atoms = [
-                (line.startswith("ATOM") or line.startswith("HETATM")),
-                line.startswith("HETATM"),
-                line.startswith("ATOM"),
-            ]
-
-            if conditional_atoms[type]:
-                name = line[17:20].strip()
-                chain = line[21:22].strip()
-                res_id = line[22:27].strip()
-                if curr_model != 0:
-                    model = curr_model.strip()
-                else:
-                    model = "1"
-                if chain == "":
-                    chain = " "
-
-                for nstr in residues:
-                    if (
-                        nstr["res_id"] == res_id and nstr["name"] == name and nstr["chain"] == chain and nstr["model"] == model
-                    ):
-                        new_file_lines.append(line)
-
-    if int(curr_model) > 0:
-        new_file_lines.append("ENDMDL\n")
+            if line.startswith(b"MODEL "):
+                num_models += 1
+                model = pdb_model_number(line.decode(), num_models)
+                start = offset
+            elif line.startswith(b"ENDMDL") and start is not None:
+                models.append((model, start, offset + len(line)))
+                start = None
+            offset += len(line)
+    if start is not None:
+        models.append((model, start, offset))
+    return models
 
-    fu.log("Writting pdb to: %s" % (output), out_log)
 
-    # save new file with heteroatoms
-    with open(output, "w") as outfile:
-        for line in new_file_lines:
-            outfile.write(line)
+def read_pdb_models(input, blocks):
+    """Lines of the given (start, end) byte offset blocks of a PDB file, read in file order"""
+    return list(iter_pdb_lines(input, blocks))
 
 
 def create_biopython_residue(residue):
@@ -172,6 +384,11 @@ def create_biopython_residue(residue):
     }
 
 
+def residue_key(residue):
+    """Hashable identity of a residue dictionary: (model, chain, res_id, name)"""
+    return (residue["model"], residue["chain"], residue["res_id"], residue["name"])
+
+
 def create_residues_list(residues, out_log):
     """Check format of residues list"""
     if not residues:
@@ -191,6 +408,11 @@ def create_residues_list(residues, out_log):
                 code.append("chain")
             if "model" in residue:
                 code.append("model")
+        elif ":" in str(residue):
+            # chain:res_id or chain:res_id range, ie A:10-250
+            chain, res_id = str(residue).split(":", 1)
+            d = {"chain": chain, "res_id": res_id}
+            code.extend(["res_id", "chain"])
         else:
             d = {"res_id": str(residue)}
             code.append("res_id")
@@ -201,6 +423,63 @@ def create_residues_list(residues, out_log):
     return list_residues
 
 
+class ResidueSelector:
+    """Residue selection compiled from a list of selectors as returned by create_residues_list or
+    check_format_heteroatoms. Selectors are grouped by the fields they specify, so matching a residue
+    dictionary costs one hash lookup per group. A res_id may be a range, ie "10-250", matching
+    every residue number in between. An empty list of selectors matches every residue."""
+
+    def __init__(self, selectors):
+        # fields of the group -> set of the values of its selectors
+        self.exact = {}
+        # fields of the group (without res_id) -> values of its selectors -> list of res_id ranges
+        self.ranges = {}
+        self.select_all = not selectors
+        for selector in selectors or []:
+            code = selector.get("code", [f for f in RESIDUE_FIELDS if f in selector])
+            fields = tuple(f for f in RESIDUE_FIELDS if f in code)
+            res_id_range = RES_ID_RANGE.match(str(selector.get("res_id", "")))
+            if "res_id" in fields and res_id_range:
+                fields = tuple(f for f in fields if f != "res_id")
+                values = tuple(str(selector[f]).strip() for f in fields)
+                self.ranges.setdefault(fields, {}).setdefault(values, []).append(
+                    (int(res_id_range.group(1)), int(res_id_range.group(2)))
+                )
+            else:
+                values = tuple(str(selector[f]).strip() for f in fields)
+                self.exact.setdefault(fields, set()).add(values)
+
+    def models(self):
+        """Models every selector is restricted to, None if some selector matches residues of any model"""
+        if self.select_all:
+            return None
+        models = set()
+        for groups in (self.exact, self.ranges):
+            for fields, values in groups.items():
+                if "model" not in fields:
+                    return None
+                i_model = fields.index("model")
+                models.update(value[i_model] for value in values)
+        return models
+
+    def matches(self, residue):
+        """Checks if a residue dictionary is selected by any of the selectors"""
+        if self.select_all:
+            return True
+        for fields, values in self.exact.items():
+            if tuple(residue[f].strip() for f in fields) in values:
+                return True
+        for fields, values in self.ranges.items():
+            res_id_ranges = values.get(tuple(residue[f].strip() for f in fields))
+            # the res_id of PDB lines may carry an insertion code
+            res_id = RES_ID_NUMBER.match(residue["res_id"])
+            if res_id_ranges and res_id:
+                res_id = int(res_id.group())
+                if any(start <= res_id <= end for start, end in res_id_ranges):
+                    return True
+        return False
+
+
 def check_format_heteroatoms(hets, out_log):
     """Check format of heteroatoms list"""
     if not hets:
@@ -8,7 +8,7 @@ from biobb_common.generic.biobb_object import BiobbObject
 from biobb_common.tools import file_utils as fu
 from biobb_common.tools.file_utils import launchlogger
 
-from biobb_structure_utils.gro_lib.gro import Gro
+from biobb_structure_utils.gro_lib.gro import iter_gro_frames
 from biobb_structure_utils.utils.common import PDB_SERIAL_RECORDS
 
 
@@ -23,6 +23,8 @@ class ExtractAtoms(BiobbObject):
         output_structure_path (str): Output structure file path. File type: output. `Sample file <https://github.com/bioexcel/biobb_structure_utils/raw/master/biobb_structure_utils/test/reference/utils/OE2_atoms.pdb>`_. Accepted formats: pdb (edam:format_1476), gro (edam:format_2033).
         properties (dic - Python dictionary object containing the tool parameters, not input/output files):
             * **regular_expression_pattern** (*str*) - ("^D") Python style regular expression matching the selected atom names.
+            * **vectorized_gro_reader** (*bool*) - (True) Decode the atom records of the input GRO file in a single vectorized pass, falling back to the line by line reader for non fixed-width files.
+            * **keep_gro_raw_lines** (*bool*) - (False) Write the atom lines of the input GRO file back verbatim for the atoms that are not modified, preserving their original precision.
             * **remove_tmp** (*bool*) - (True) [WF property] Remove temporal files.
             * **restart** (*bool*) - (False) [WF property] Do not execute if output files exist.
             * **sandbox_path** (*str*) - ("./") [WF property] Parent path to the sandbox directory.
@@ -67,6 +69,8 @@ class ExtractAtoms(BiobbObject):
         self.regular_expression_pattern = properties.get(
             "regular_expression_pattern", "^D"
         )
+        self.vectorized_gro_reader = properties.get("vectorized_gro_reader", True)
+        self.keep_gro_raw_lines = properties.get("keep_gro_raw_lines", False)
 
         # Check the properties
         self.check_properties(properties)
@@ -89,23 +93,35 @@ class ExtractAtoms(BiobbObject):
                 % self.regular_expression_pattern,
                 self.out_log,
             )
-            gro_st = Gro()
-            gro_st.read_gro_file(self.io_dict["in"]["input_structure_path"])
-            gro_st.select_atoms(self.regular_expression_pattern)
-            if gro_st.num_of_atoms:
+            # Every frame of a GRO trajectory is processed in one streaming pass
+            atoms_match_cont = 0
+            frames_cont = 0
+            with open(self.io_dict["out"]["output_structure_path"], "w") as output_gro:
+                for gro_st in iter_gro_frames(
+                    self.io_dict["in"]["input_structure_path"],
+                    vectorized=self.vectorized_gro_reader,
+                    keep_raw_lines=self.keep_gro_raw_lines,
+                ):
+                    gro_st.select_atoms(self.regular_expression_pattern)
+                    if not gro_st.num_of_atoms:
+                        # All the frames share the same atoms
+                        break
+                    atoms_match_cont = gro_st.num_of_atoms
+                    frames_cont += 1
+                    gro_st.write_gro_frame(output_gro)
+            if atoms_match_cont:
                 fu.log(
-                    "%d atoms found writting GRO file" % gro_st.num_of_atoms,
+                    "%d atoms found writting GRO file (%d frames)"
+                    % (atoms_match_cont, frames_cont),
                     self.out_log,
                     self.global_log,
                 )
-                gro_st.write_gro_file(self.io_dict["out"]["output_structure_path"])
             else:
                 fu.log(
                     "No matching atoms found writting empty GRO file",
                     self.out_log,
                     self.global_log,
                 )
-                open(self.io_dict["out"]["output_structure_path"], "w").close()
 
         else:
             fu.log(
@@ -117,6 +133,9 @@ class ExtractAtoms(BiobbObject):
             # issues presented in commit message (c92aab9604a6a31d13f4170ff47b231df0a588ef)
             # with the Biopython library
             atoms_match_cont = 0
+            # The pattern is searched once per distinct atom name
+            pattern = re.compile(self.regular_expression_pattern)
+            name_matches = {}
             with open(
                 self.io_dict["in"]["input_structure_path"], "r"
             ) as input_pdb, open(
@@ -128,7 +147,11 @@ class ExtractAtoms(BiobbObject):
                         len(line) > 10 and record in PDB_SERIAL_RECORDS
                     ):  # Avoid MODEL, ENDMDL records and empty lines
                         pdb_atom_name = line[12:16].strip()
-                        if re.search(self.regular_expression_pattern, pdb_atom_name):
+                        if pdb_atom_name not in name_matches:
+                            name_matches[pdb_atom_name] = (
+                                pattern.search(pdb_atom_name) is not None
+                            )
+                        if name_matches[pdb_atom_name]:
                             atoms_match_cont += 1
                             output_pdb.write(line)
             if atoms_match_cont:
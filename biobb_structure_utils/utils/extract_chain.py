@@ -12,6 +12,7 @@ from biobb_structure_utils.utils.common import (
     check_input_path,
     check_output_path,
 )
+from biobb_structure_utils.utils.structure_checking import run_check_structure
 
 
 class ExtractChain(BiobbObject):
@@ -27,6 +28,9 @@ class ExtractChain(BiobbObject):
             * **chains** (*list*) - (None) List of chains to be extracted from the input_structure_path file. If empty, all the chains of the structure will be returned.
             * **permissive** (*bool*) - (False) Use non standard PDB files.
             * **binary_path** (*string*) - ("check_structure") path to the check_structure application
+            * **in_process** (*bool*) - (False) Run check_structure through the biobb_structure_checking library in the current Python process instead of launching the binary_path application. Command lists are given inline instead of through temporary files. The output is captured from the process wide standard output, so the in process runs of concurrent threads are serialized. The container_path, timeout and env_vars_dict properties are not used.
+            * **use_worker_pool** (*bool*) - (False) Run check_structure in an idle process of a pool of long lived workers, instead of launching the binary_path application. The workers keep the biobb_structure_checking modules imported, saving the interpreter start up and the imports of every command; the residue and data libraries are still read by every command. The pool is shared by all the building blocks of the Python process, is started on first use and lasts until shutdown_worker_pool is called or the process exits. Command lists are given inline instead of through temporary files.
+            * **worker_pool_size** (*int*) - (None) Number of worker processes of the pool, by default the number of CPUs. A running pool of a different size is replaced.
             * **remove_tmp** (*bool*) - (True) [WF property] Remove temporal files.
             * **restart** (*bool*) - (False) [WF property] Do not execute if output files exist.
             * **sandbox_path** (*str*) - ("./") [WF property] Parent path to the sandbox directory.
@@ -70,6 +74,9 @@ class ExtractChain(BiobbObject):
 
         # Properties specific for BB
         self.binary_path = properties.get("binary_path", "check_structure")
+        self.in_process = properties.get("in_process", False)
+        self.use_worker_pool = properties.get("use_worker_pool", False)
+        self.worker_pool_size = properties.get("worker_pool_size", None)
         self.chains = _from_string_to_list(properties.get("chains", []))
         self.permissive = properties.get("permissive", False)
         self.properties = properties
@@ -141,7 +148,10 @@ class ExtractChain(BiobbObject):
             ]
 
             # Run Biobb block
-            self.run_biobb()
+            if self.in_process or self.use_worker_pool:
+                self.return_code = run_check_structure(self)
+            else:
+                self.run_biobb()
 
         # Copy files to host
         self.copy_to_host()
@@ -8,6 +8,7 @@ from biobb_common.tools import file_utils as fu
 from biobb_common.tools.file_utils import launchlogger
 
 from biobb_structure_utils.utils.common import (
+    ResidueSelector,
     _from_string_to_list,
     check_format_heteroatoms,
     check_input_path,
@@ -109,6 +110,7 @@ class ExtractHeteroAtoms(BiobbObject):
         # Business code
         # get list of heteroatoms from properties
         list_heteroatoms = check_format_heteroatoms(self.heteroatoms, self.out_log)
+        selector = ResidueSelector(list_heteroatoms)
 
         # load input into BioPython structure
         structure = PDBParser(QUIET=True).get_structure(
@@ -119,22 +121,7 @@ class ExtractHeteroAtoms(BiobbObject):
         # get desired heteroatoms
         for residue in structure.get_residues():
             r = create_biopython_residue(residue)
-            if list_heteroatoms:
-                for het in list_heteroatoms:
-                    match = True
-                    for code in het["code"]:
-                        if het[code].strip() != r[code].strip():
-                            match = False
-                            break
-
-                    if match:
-                        if not self.water and (
-                            r["name"] == "HOH" or r["name"] == "SOL" or r["name"] == "WAT"
-                        ):
-                            pass
-                        else:
-                            new_structure.append(r)
-            else:
+            if selector.matches(r):
                 if not self.water and (
                     r["name"] == "HOH" or r["name"] == "SOL" or r["name"] == "WAT"
                 ):
@@ -7,7 +7,16 @@ from biobb_common.generic.biobb_object import BiobbObject
 from biobb_common.tools import file_utils as fu
 from biobb_common.tools.file_utils import launchlogger
 
-from biobb_structure_utils.utils.common import check_input_path, check_output_path
+from biobb_structure_utils.utils.common import (
+    MODEL_INDEX_SUFFIX,
+    OUTPUT_BUFFER_SIZE,
+    check_input_path,
+    check_output_path,
+    pdb_model_index,
+    pdb_model_number,
+    read_pdb_models,
+)
+from biobb_structure_utils.utils.structure_checking import run_check_structure
 
 
 class ExtractModel(BiobbObject):
@@ -21,7 +30,12 @@ class ExtractModel(BiobbObject):
         output_structure_path (str): Output structure file path. File type: output. `Sample file <https://github.com/bioexcel/biobb_structure_utils/raw/master/biobb_structure_utils/test/reference/utils/ref_extract_model.pdb>`_. Accepted formats: pdb (edam:format_1476), pdbqt (edam:format_1476).
         properties (dic - Python dictionary object containing the tool parameters, not input/output files):
             * **models** (*list*) - (None) List of models to be extracted from the input_structure_path file. If empty, all the models of the structure will be returned.
+            * **use_check_structure** (*bool*) - (False) Extract every model with its own check_structure process instead of copying the requested models from a single pass over the input. The check_structure path is also used when some requested model is not found in the input.
+            * **use_model_index** (*bool*) - (False) Read the requested models straight from their byte offsets, kept in a sidecar index saved next to the input file with the .models.json suffix. The index is built on first use and rebuilt when the size or modification time of the input change.
             * **binary_path** (*string*) - ("check_structure") path to the check_structure application
+            * **in_process** (*bool*) - (False) Run check_structure through the biobb_structure_checking library in the current Python process instead of launching the binary_path application. Command lists are given inline instead of through temporary files. The output is captured from the process wide standard output, so the in process runs of concurrent threads are serialized. The container_path, timeout and env_vars_dict properties are not used.
+            * **use_worker_pool** (*bool*) - (False) Run check_structure in an idle process of a pool of long lived workers, instead of launching the binary_path application. The workers keep the biobb_structure_checking modules imported, saving the interpreter start up and the imports of every command; the residue and data libraries are still read by every command. The pool is shared by all the building blocks of the Python process, is started on first use and lasts until shutdown_worker_pool is called or the process exits. Command lists are given inline instead of through temporary files.
+            * **worker_pool_size** (*int*) - (None) Number of worker processes of the pool, by default the number of CPUs. A running pool of a different size is replaced.
             * **remove_tmp** (*bool*) - (True) [WF property] Remove temporal files.
             * **restart** (*bool*) - (False) [WF property] Do not execute if output files exist.
             * **sandbox_path** (*str*) - ("./") [WF property] Parent path to the sandbox directory.
@@ -65,7 +79,12 @@ class ExtractModel(BiobbObject):
 
         # Properties specific for BB
         self.binary_path = properties.get("binary_path", "check_structure")
+        self.in_process = properties.get("in_process", False)
+        self.use_worker_pool = properties.get("use_worker_pool", False)
+        self.worker_pool_size = properties.get("worker_pool_size", None)
         self.models = properties.get("models", [])
+        self.use_check_structure = properties.get("use_check_structure", False)
+        self.use_model_index = properties.get("use_model_index", False)
         self.properties = properties
 
         # Check the properties
@@ -102,6 +121,18 @@ class ExtractModel(BiobbObject):
             )
 
             return 0
+        elif not self.use_check_structure and self._extract_models(models):
+            self.return_code = 0
+
+            # Copy files to host
+            self.copy_to_host()
+
+            # Remove temporal files
+            self.remove_tmp_files()
+
+            self.check_arguments(output_files_created=True, raise_exception=False)
+
+            return self.return_code
         else:
             # create temporary folder
             tmp_folder = fu.create_unique_dir()
@@ -125,7 +156,10 @@ class ExtractModel(BiobbObject):
                 ]
 
                 # Run Biobb block
-                self.run_biobb()
+                if self.in_process or self.use_worker_pool:
+                    self.return_code = run_check_structure(self)
+                else:
+                    self.run_biobb()
 
                 filenames.append(tmp_file)
 
@@ -151,6 +185,95 @@ class ExtractModel(BiobbObject):
 
             return self.return_code
 
+    def _extract_models(self, models):
+        """Copies the requested models to the output in a single pass over the input, stopping as soon as they
+        have been written. Returns False, leaving the output incomplete, if some model is not found"""
+        models = [int(model) for model in models]
+        if self.use_model_index and self._extract_indexed_models(models):
+            return True
+        # a model is kept in memory from when it is read until it is written for the last time
+        last_use = {model: i_model for i_model, model in enumerate(models)}
+        pending = {}
+        written = 0
+        with open(self.stage_io_dict["in"]["input_structure_path"]) as input_pdb, open(
+            self.stage_io_dict["out"]["output_structure_path"], "w", buffering=OUTPUT_BUFFER_SIZE
+        ) as output_pdb:
+            for model, lines in iter_model_blocks(input_pdb):
+                if model not in last_use:
+                    continue
+                pending[model] = lines
+                while written < len(models) and models[written] in pending:
+                    write_model_block(output_pdb, written + 1, pending[models[written]])
+                    if last_use[models[written]] == written:
+                        del pending[models[written]]
+                    written += 1
+                if written == len(models):
+                    fu.log("%d models extracted" % written, self.out_log)
+                    return True
+        missing = sorted(set(models[written:]) - set(pending))
+        fu.log(
+            "Models %s not found, extracting with %s" % (missing, self.binary_path),
+            self.out_log,
+        )
+        return False
+
+    def _extract_indexed_models(self, models):
+        """Copies the requested models to the output reading only their blocks, found in the model index of
+        the input. Returns False if some model is not in the index"""
+        model_index = {
+            int(model): block
+            for model, block in pdb_model_index(
+                self.stage_io_dict["in"]["input_structure_path"],
+                self.io_dict["in"]["input_structure_path"] + MODEL_INDEX_SUFFIX,
+                self.out_log,
+            ).items()
+        }
+        if not all(model in model_index for model in models):
+            return False
+        with open(
+            self.stage_io_dict["out"]["output_structure_path"], "w", buffering=OUTPUT_BUFFER_SIZE
+        ) as output_pdb:
+            for i_model, model in enumerate(models):
+                block_lines = read_pdb_models(
+                    self.stage_io_dict["in"]["input_structure_path"], [model_index[model]]
+                )
+                for _, lines in iter_model_blocks(block_lines):
+                    write_model_block(output_pdb, i_model + 1, lines)
+        fu.log("%d models extracted through the model index" % len(models), self.out_log)
+        return True
+
+
+def write_model_block(output_pdb, model, lines):
+    """Writes the lines of a model between MODEL and ENDMDL records"""
+    output_pdb.write("MODEL     " + "{:>4}".format(str(model)) + "\n")
+    output_pdb.writelines(lines)
+    output_pdb.write("ENDMDL\n")
+
+
+def iter_model_blocks(input_pdb):
+    """Yields the number and the coordinate lines of every MODEL/ENDMDL block of a PDB file, without the
+    MODEL and ENDMDL records; the coordinates of a file without MODEL records are model 1, and a MODEL
+    record without serial number is numbered by its position, see pdb_model_number"""
+    model = None
+    num_models = 0
+    lines = []
+    for line in input_pdb:
+        if line.startswith("MODEL "):
+            num_models += 1
+            model = int(pdb_model_number(line, num_models))
+            lines = []
+        elif line.startswith("ENDMDL"):
+            if model is not None:
+                yield model, lines
+            model = None
+            lines = []
+        elif line.startswith(("ATOM", "HETATM", "ANISOU", "TER")):
+            lines.append(line)
+    if model is not None:
+        yield model, lines
+    elif not num_models and lines:
+        yield 1, lines
+
 
 def check_format_models(models, out_log):
     """Check format of models list"""
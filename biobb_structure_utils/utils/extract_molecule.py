@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 """Module containing the ExtractMolecule class and the command line interface."""
+import shlex
 from typing import Optional
 from biobb_common.generic.biobb_object import BiobbObject
 from biobb_common.tools import file_utils as fu
@@ -11,6 +12,7 @@ from biobb_structure_utils.utils.common import (
     check_input_path,
     check_output_path,
 )
+from biobb_structure_utils.utils.structure_checking import run_check_structure
 
 
 class ExtractMolecule(BiobbObject):
@@ -26,6 +28,9 @@ class ExtractMolecule(BiobbObject):
             * **molecule_type** (*string*) - ("all") type of molecule to be extracted. If all, only waters and ligands will be removed from the original structure. Values: all, protein, na, dna, rna, chains.
             * **chains** (*list*) - (None) if chains selected in **molecule_type**, specify them here, e.g: ["A", "C", "N"].
             * **binary_path** (*string*) - ("check_structure") path to the check_structure application
+            * **in_process** (*bool*) - (False) Run check_structure through the biobb_structure_checking library in the current Python process instead of launching the binary_path application. Command lists are given inline instead of through temporary files. The output is captured from the process wide standard output, so the in process runs of concurrent threads are serialized. The container_path, timeout and env_vars_dict properties are not used.
+            * **use_worker_pool** (*bool*) - (False) Run check_structure in an idle process of a pool of long lived workers, instead of launching the binary_path application. The workers keep the biobb_structure_checking modules imported, saving the interpreter start up and the imports of every command; the residue and data libraries are still read by every command. The pool is shared by all the building blocks of the Python process, is started on first use and lasts until shutdown_worker_pool is called or the process exits. Command lists are given inline instead of through temporary files.
+            * **worker_pool_size** (*int*) - (None) Number of worker processes of the pool, by default the number of CPUs. A running pool of a different size is replaced.
             * **remove_tmp** (*bool*) - (True) [WF property] Remove temporal files.
             * **restart** (*bool*) - (False) [WF property] Do not execute if output files exist.
             * **sandbox_path** (*str*) - ("./") [WF property] Parent path to the sandbox directory.
@@ -72,14 +77,17 @@ class ExtractMolecule(BiobbObject):
         self.molecule_type = properties.get("molecule_type", "all")
         self.chains = _from_string_to_list(properties.get("chains", []))
         self.binary_path = properties.get("binary_path", "check_structure")
+        self.in_process = properties.get("in_process", False)
+        self.use_worker_pool = properties.get("use_worker_pool", False)
+        self.worker_pool_size = properties.get("worker_pool_size", None)
         self.properties = properties
 
         # Check the properties
         self.check_properties(properties)
         self.check_arguments()
 
-    def create_command_list(self, command_list_path):
-        """Creates a command list file as a input for structure checking"""
+    def command_list(self):
+        """Returns the commands of the command list for structure checking"""
         instructions_list = ["ligands --remove All", "water --remove Yes"]
 
         if self.molecule_type != "all":
@@ -88,8 +96,12 @@ class ExtractMolecule(BiobbObject):
             else:
                 instructions_list.append("chains --select " + self.molecule_type)
 
+        return instructions_list
+
+    def create_command_list(self, command_list_path):
+        """Creates a command list file as a input for structure checking"""
         with open(command_list_path, "w") as clp:
-            for line in instructions_list:
+            for line in self.command_list():
                 clp.write(line.strip() + "\n")
 
         return command_list_path
@@ -114,12 +126,17 @@ class ExtractMolecule(BiobbObject):
             return 0
         self.stage_files()
 
-        # create temporary folder
-        tmp_folder = fu.create_unique_dir()
-        fu.log("Creating %s temporary folder" % tmp_folder, self.out_log)
+        if self.in_process or self.use_worker_pool:
+            # the command list is given inline
+            tmp_folder = None
+            command_list_file = shlex.quote(";".join(self.command_list()))
+        else:
+            # create temporary folder
+            tmp_folder = fu.create_unique_dir()
+            fu.log("Creating %s temporary folder" % tmp_folder, self.out_log)
 
-        # create command list file
-        command_list_file = self.create_command_list(tmp_folder + "/extract_prot.lst")
+            # create command list file
+            command_list_file = self.create_command_list(tmp_folder + "/extract_prot.lst")
 
         # run command line
         self.cmd = [
@@ -136,7 +153,10 @@ class ExtractMolecule(BiobbObject):
         ]
 
         # Run Biobb block
-        self.run_biobb()
+        if self.in_process or self.use_worker_pool:
+            self.return_code = run_check_structure(self)
+        else:
+            self.run_biobb()
 
         # Copy files to host
         self.copy_to_host()
@@ -8,6 +8,7 @@ from biobb_common.tools import file_utils as fu
 from biobb_common.tools.file_utils import launchlogger
 
 from biobb_structure_utils.utils.common import (
+    ResidueSelector,
     _from_string_to_list,
     check_input_path,
     check_output_path,
@@ -27,7 +28,7 @@ class ExtractResidues(BiobbObject):
         input_structure_path (str): Input structure file path. File type: input. `Sample file <https://github.com/bioexcel/biobb_structure_utils/raw/master/biobb_structure_utils/test/data/utils/extract_heteroatom.pdb>`_. Accepted formats: pdb (edam:format_1476), pdbqt (edam:format_1476).
         output_residues_path (str): Output residues file path. File type: output. `Sample file <https://github.com/bioexcel/biobb_structure_utils/raw/master/biobb_structure_utils/test/reference/utils/ref_extract_residues.pdb>`_. Accepted formats: pdb (edam:format_1476), pdbqt (edam:format_1476).
         properties (dic - Python dictionary object containing the tool parameters, not input/output files):
-            * **residues** (*list*) - (None) List of comma separated res_id (will extract all residues that match the res_id) or list of dictionaries with the name | res_id  | chain | model of the residues to be extracted. Format: [{"name": "HIS", "res_id": "72", "chain": "A", "model": "1"}].
+            * **residues** (*list*) - (None) List of comma separated res_id (will extract all residues that match the res_id) or list of dictionaries with the name | res_id  | chain | model of the residues to be extracted. Format: [{"name": "HIS", "res_id": "72", "chain": "A", "model": "1"}]. Residue ranges, optionally preceded by the chain, are also accepted: "A:10-250".
             * **remove_tmp** (*bool*) - (True) [WF property] Remove temporal files.
             * **restart** (*bool*) - (False) [WF property] Do not execute if output files exist.
             * **sandbox_path** (*str*) - ("./") [WF property] Parent path to the sandbox directory.
@@ -107,6 +108,7 @@ class ExtractResidues(BiobbObject):
         # Business code
         # get list of Residues from properties
         list_residues = create_residues_list(self.residues, self.out_log)
+        selector = ResidueSelector(list_residues)
 
         # load input into BioPython structure
         structure = PDBParser(QUIET=True).get_structure(
@@ -117,16 +119,7 @@ class ExtractResidues(BiobbObject):
         # get desired residues
         for residue in structure.get_residues():
             r = create_biopython_residue(residue)
-            if list_residues:
-                for res in list_residues:
-                    match = True
-                    for code in res["code"]:
-                        if res[code].strip() != r[code].strip():
-                            match = False
-                            break
-                    if match:
-                        new_structure.append(r)
-            else:
+            if selector.matches(r):
                 new_structure.append(r)
 
         # if not residues found in structure, raise exit
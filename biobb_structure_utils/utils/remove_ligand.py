@@ -7,7 +7,7 @@ from biobb_common.generic.biobb_object import BiobbObject
 from biobb_common.tools import file_utils as fu
 from biobb_common.tools.file_utils import launchlogger
 
-from biobb_structure_utils.gro_lib.gro import Gro
+from biobb_structure_utils.gro_lib.gro import iter_gro_frames
 
 
 class RemoveLigand(BiobbObject):
@@ -21,6 +21,8 @@ class RemoveLigand(BiobbObject):
         output_structure_path (str): Output structure file path. File type: output. `Sample file <https://github.com/bioexcel/biobb_structure_utils/raw/master/biobb_structure_utils/test/reference/utils/WT_apo_md_1.pdb>`_. Accepted formats: pdb (edam:format_1476), gro (edam:format_2033).
         properties (dic - Python dictionary object containing the tool parameters, not input/output files):
             * **ligand** (*str*) - ("AQ4") Residue code of the ligand to be removed.
+            * **vectorized_gro_reader** (*bool*) - (True) Decode the atom records of the input GRO file in a single vectorized pass, falling back to the line by line reader for non fixed-width files.
+            * **keep_gro_raw_lines** (*bool*) - (False) Write the atom lines of the input GRO file back verbatim for the atoms that are not modified, preserving their original precision.
             * **remove_tmp** (*bool*) - (True) [WF property] Remove temporal files.
             * **restart** (*bool*) - (False) [WF property] Do not execute if output files exist.
             * **sandbox_path** (*str*) - ("./") [WF property] Parent path to the sandbox directory.
@@ -63,6 +65,8 @@ class RemoveLigand(BiobbObject):
 
         # Properties specific for BB
         self.ligand = properties.get("ligand", "AQ4")
+        self.vectorized_gro_reader = properties.get("vectorized_gro_reader", True)
+        self.keep_gro_raw_lines = properties.get("keep_gro_raw_lines", False)
 
         # Check the properties
         self.check_properties(properties)
@@ -87,10 +91,17 @@ class RemoveLigand(BiobbObject):
                 % self.ligand,
                 self.out_log,
             )
-            gro_st = Gro()
-            gro_st.read_gro_file(self.stage_io_dict["in"]["input_structure_path"])
-            gro_st.remove_residues([self.ligand])
-            gro_st.write_gro_file(self.stage_io_dict["out"]["output_structure_path"])
+            # Every frame of a GRO trajectory is processed in one streaming pass
+            with open(
+                self.stage_io_dict["out"]["output_structure_path"], "w"
+            ) as output_gro:
+                for gro_st in iter_gro_frames(
+                    self.stage_io_dict["in"]["input_structure_path"],
+                    vectorized=self.vectorized_gro_reader,
+                    keep_raw_lines=self.keep_gro_raw_lines,
+                ):
+                    gro_st.remove_residues([self.ligand])
+                    gro_st.write_gro_frame(output_gro)
 
         else:
             fu.log(
@@ -8,12 +8,14 @@ from biobb_common.tools import file_utils as fu
 from biobb_common.tools.file_utils import launchlogger
 
 from biobb_structure_utils.utils.common import (
+    ResidueSelector,
     _from_string_to_list,
     check_input_path,
     check_output_path,
     create_biopython_residue,
     create_output_file,
     create_residues_list,
+    residue_key,
 )
 
 
@@ -27,7 +29,7 @@ class RemoveMolecules(BiobbObject):
         input_structure_path (str): Input structure file path. File type: input. `Sample file <https://github.com/bioexcel/biobb_structure_utils/raw/master/biobb_structure_utils/test/data/utils/2vgb.pdb>`_. Accepted formats: pdb (edam:format_1476), pdbqt (edam:format_1476).
         output_molecules_path (str): Output molcules file path. File type: output. `Sample file <https://github.com/bioexcel/biobb_structure_utils/raw/master/biobb_structure_utils/test/reference/utils/ref_remove_molecules.pdb>`_. Accepted formats: pdb (edam:format_1476), pdbqt (edam:format_1476).
         properties (dic - Python dictionary object containing the tool parameters, not input/output files):
-            * **molecules** (*list*) - (None) List of comma separated res_id (will remove all molecules that match the res_id) or list of dictionaries with the name | res_id  | chain | model of the molecules to be removed. Format: [{"name": "HIS", "res_id": "72", "chain": "A", "model": "1"}].
+            * **molecules** (*list*) - (None) List of comma separated res_id (will remove all molecules that match the res_id) or list of dictionaries with the name | res_id  | chain | model of the molecules to be removed. Format: [{"name": "HIS", "res_id": "72", "chain": "A", "model": "1"}]. Residue ranges, optionally preceded by the chain, are also accepted: "A:10-250".
             * **remove_tmp** (*bool*) - (True) [WF property] Remove temporal files.
             * **restart** (*bool*) - (False) [WF property] Do not execute if output files exist.
             * **sandbox_path** (*str*) - ("./") [WF property] Parent path to the sandbox directory.
@@ -107,6 +109,7 @@ class RemoveMolecules(BiobbObject):
         # Business code
         # get list of Residues from properties
         list_residues = create_residues_list(self.molecules, self.out_log)
+        selector = ResidueSelector(list_residues)
 
         # load input into BioPython structure
         structure = PDBParser(QUIET=True).get_structure(
@@ -119,16 +122,7 @@ class RemoveMolecules(BiobbObject):
         for residue in structure.get_residues():
             r = create_biopython_residue(residue)
             whole_structure.append(r)
-            if list_residues:
-                for res in list_residues:
-                    match = True
-                    for code in res["code"]:
-                        if res[code].strip() != r[code].strip():
-                            match = False
-                            break
-                    if match:
-                        remove_structure.append(r)
-            else:
+            if selector.matches(r):
                 remove_structure.append(r)
 
         # if not residues found in structure, raise exit
@@ -142,7 +136,8 @@ class RemoveMolecules(BiobbObject):
             )
 
         # substract residues (remove_structure) from whole_structure
-        new_structure = [x for x in whole_structure if x not in remove_structure]
+        remove_keys = {residue_key(x) for x in remove_structure}
+        new_structure = [x for x in whole_structure if residue_key(x) not in remove_keys]
 
         create_output_file(
             0,
@@ -5,6 +5,8 @@ from typing import Optional
 from biobb_common.generic.biobb_object import BiobbObject
 from biobb_common.tools.file_utils import launchlogger
 
+from biobb_structure_utils.utils.structure_checking import run_check_structure
+
 
 class RemovePdbWater(BiobbObject):
     """
@@ -17,6 +19,9 @@ class RemovePdbWater(BiobbObject):
         output_pdb_path (str): Output PDB file path. File type: output. `Sample file <https://github.com/bioexcel/biobb_structure_utils/raw/master/biobb_structure_utils/test/reference/utils/WT_apo_no_wat.pdb>`_. Accepted formats: pdb (edam:format_1476).
         properties (dic - Python dictionary object containing the tool parameters, not input/output files):
             * **binary_path** (*string*) - ("check_structure") path to the check_structure application
+            * **in_process** (*bool*) - (False) Run check_structure through the biobb_structure_checking library in the current Python process instead of launching the binary_path application. Command lists are given inline instead of through temporary files. The output is captured from the process wide standard output, so the in process runs of concurrent threads are serialized. The container_path, timeout and env_vars_dict properties are not used.
+            * **use_worker_pool** (*bool*) - (False) Run check_structure in an idle process of a pool of long lived workers, instead of launching the binary_path application. The workers keep the biobb_structure_checking modules imported, saving the interpreter start up and the imports of every command; the residue and data libraries are still read by every command. The pool is shared by all the building blocks of the Python process, is started on first use and lasts until shutdown_worker_pool is called or the process exits. Command lists are given inline instead of through temporary files.
+            * **worker_pool_size** (*int*) - (None) Number of worker processes of the pool, by default the number of CPUs. A running pool of a different size is replaced.
             * **remove_tmp** (*bool*) - (True) [WF property] Remove temporal files.
             * **restart** (*bool*) - (False) [WF property] Do not execute if output files exist.
             * **sandbox_path** (*str*) - ("./") [WF property] Parent path to the sandbox directory.
@@ -58,6 +63,9 @@ class RemovePdbWater(BiobbObject):
 
         # Properties specific for BB
         self.binary_path = properties.get("binary_path", "check_structure")
+        self.in_process = properties.get("in_process", False)
+        self.use_worker_pool = properties.get("use_worker_pool", False)
+        self.worker_pool_size = properties.get("worker_pool_size", None)
 
         # Check the properties
         self.check_properties(properties)
@@ -85,7 +93,10 @@ class RemovePdbWater(BiobbObject):
         ]
 
         # Run Biobb block
-        self.run_biobb()
+        if self.in_process or self.use_worker_pool:
+            self.return_code = run_check_structure(self)
+        else:
+            self.run_biobb()
 
         # Copy files to host
         self.copy_to_host()
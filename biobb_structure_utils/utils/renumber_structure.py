@@ -8,7 +8,7 @@ from biobb_common.generic.biobb_object import BiobbObject
 from biobb_common.tools import file_utils as fu
 from biobb_common.tools.file_utils import launchlogger
 
-from biobb_structure_utils.gro_lib.gro import Gro
+from biobb_structure_utils.gro_lib.gro import iter_gro_frames
 from biobb_structure_utils.utils.common import PDB_SERIAL_RECORDS
 
 
@@ -25,6 +25,7 @@ class RenumberStructure(BiobbObject):
         properties (dic - Python dictionary object containing the tool parameters, not input/output files):
             * **renumber_residues** (*bool*) - (True) Residue code of the ligand to be removed.
             * **renumber_residues_per_chain** (*bool*) - (True) Restart residue enumeration every time a new chain is detected.
+            * **vectorized_gro_reader** (*bool*) - (True) Decode the atom records of the input GRO file in a single vectorized pass, falling back to the line by line reader for non fixed-width files.
             * **remove_tmp** (*bool*) - (True) [WF property] Remove temporal files.
             * **restart** (*bool*) - (False) [WF property] Do not execute if output files exist.
             * **sandbox_path** (*str*) - ("./") [WF property] Parent path to the sandbox directory.
@@ -80,6 +81,7 @@ class RenumberStructure(BiobbObject):
         self.renumber_residues_per_chain = properties.get(
             "renumber_residues_per_chain", True
         )
+        self.vectorized_gro_reader = properties.get("vectorized_gro_reader", True)
 
         # Common in all BB
         self.can_write_console_log = properties.get("can_write_console_log", True)
@@ -109,13 +111,26 @@ class RenumberStructure(BiobbObject):
         ).suffix.lower()
         if extension.lower() == ".gro":
             fu.log("GRO format detected, reenumerating atoms", self.out_log)
-            gro_st = Gro()
-            gro_st.read_gro_file(self.stage_io_dict["in"]["input_structure_path"])
-            residue_mapping, atom_mapping = gro_st.renumber_atoms(
-                renumber_residues=self.renumber_residues,
-                renumber_residues_per_chain=self.renumber_residues_per_chain,
-            )
-            gro_st.write_gro_file(self.stage_io_dict["out"]["output_structure_path"])
+            # Every frame of a GRO trajectory is processed in one streaming pass
+            residue_mapping, atom_mapping = {}, {}
+            with open(
+                self.stage_io_dict["out"]["output_structure_path"], "w"
+            ) as output_gro:
+                for gro_st in iter_gro_frames(
+                    self.stage_io_dict["in"]["input_structure_path"],
+                    vectorized=self.vectorized_gro_reader,
+                ):
+                    frame_residue_mapping, frame_atom_mapping = gro_st.renumber_atoms(
+                        renumber_residues=self.renumber_residues,
+                        renumber_residues_per_chain=self.renumber_residues_per_chain,
+                    )
+                    # All the frames share the same topology, keep the mapping of the first one
+                    if not atom_mapping:
+                        residue_mapping, atom_mapping = (
+                            frame_residue_mapping,
+                            frame_atom_mapping,
+                        )
+                    gro_st.write_gro_frame(output_gro)
 
         else:
             fu.log("PDB format detected, reenumerating atoms", self.out_log)
@@ -22,6 +22,8 @@ class SortGroResidues(BiobbObject):
         output_gro_path (str): Output sorted GRO file path. File type: output. `Sample file <https://github.com/bioexcel/biobb_structure_utils/raw/master/biobb_structure_utils/test/reference/utils/WT_aq4_md_sorted.gro>`_. Accepted formats: gro (edam:format_2033).
         properties (dic - Python dictionary object containing the tool parameters, not input/output files):
             * **residue_name_list** (*list*) - (["NA", "CL", "SOL"]) Ordered residue name list.
+            * **vectorized_gro_reader** (*bool*) - (True) Decode the atom records of the input GRO file in a single vectorized pass, falling back to the line by line reader for non fixed-width files.
+            * **keep_gro_raw_lines** (*bool*) - (False) Write the atom lines of the input GRO file back verbatim for the atoms that are not modified, preserving their original precision.
             * **remove_tmp** (*bool*) - (True) [WF property] Remove temporal files.
             * **restart** (*bool*) - (False) [WF property] Do not execute if output files exist.
             * **sandbox_path** (*str*) - ("./") [WF property] Parent path to the sandbox directory.
@@ -66,6 +68,8 @@ class SortGroResidues(BiobbObject):
         self.residue_name_list = _from_string_to_list(
             properties.get("residue_name_list", ["NA", "CL", "SOL"])
         )
+        self.vectorized_gro_reader = properties.get("vectorized_gro_reader", True)
+        self.keep_gro_raw_lines = properties.get("keep_gro_raw_lines", False)
 
         # Check the properties
         self.check_properties(properties)
@@ -82,7 +86,11 @@ class SortGroResidues(BiobbObject):
 
         # Business code
         in_gro = Gro()
-        in_gro.read_gro_file(self.stage_io_dict["in"]["input_gro_path"])
+        in_gro.read_gro_file(
+            self.stage_io_dict["in"]["input_gro_path"],
+            vectorized=self.vectorized_gro_reader,
+            keep_raw_lines=self.keep_gro_raw_lines,
+        )
         in_gro.sort_residues2(self.residue_name_list)
         in_gro.write_gro_file(self.stage_io_dict["out"]["output_gro_path"])
         self.return_code = 0
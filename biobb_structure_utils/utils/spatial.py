@@ -0,0 +1,241 @@
+"""Batched neighbour search functions for package biobb_structure_utils.utils"""
+
+from itertools import product
+
+import numpy as np
+
+# maximum number of probe-point pairs whose distances are computed at once
+PAIR_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+class CellList:
+    """Cell list of a set of points: the points sorted by the cubic cell of size cell_size they fall in.
+    It is built once and answers any number of searches with a cutoff up to cell_size, each search
+    comparing every probe point only with the points of its 27 neighbour cells.
+
+    Args:
+        coords (array): N x 3 coordinates of the points.
+        cell_size (float): Edge of the cells, the maximum cutoff of the searches.
+    """
+
+    def __init__(self, coords, cell_size):
+        self.coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+        self.cell_size = float(cell_size) if cell_size > 0 else 1.0
+        if len(self.coords):
+            self.origin = self.coords.min(axis=0)
+            self.upper = self.coords.max(axis=0)
+        else:
+            self.origin = self.upper = np.zeros(3)
+        self.shape = np.floor((self.upper - self.origin) / self.cell_size).astype(np.int64) + 1
+
+        # points sorted by cell, the occupied cells are kept sorted by id
+        point_ids = self._cell_ids(self._cells(self.coords))
+        self.order = np.argsort(point_ids, kind="stable")
+        self.sorted_coords = self.coords[self.order]
+        self.cell_ids, self.cell_starts, self.cell_counts = np.unique(
+            point_ids[self.order], return_index=True, return_counts=True
+        )
+
+    def _cells(self, coords):
+        """Integer coordinates of the cell of every point"""
+        return np.floor((coords - self.origin) / self.cell_size).astype(np.int64)
+
+    def _cell_ids(self, cells):
+        """Flat id of every cell"""
+        return (cells[:, 0] * self.shape[1] + cells[:, 1]) * self.shape[2] + cells[:, 2]
+
+    def _pairs(self, probe_coords, cutoff):
+        """Yields in chunks every probe-point pair of neighbour cells, grouped by probe: the probes of the chunk,
+        the start of the pairs of each probe, the sorted index of the point of each pair and their squared distances"""
+        if cutoff > self.cell_size:
+            raise ValueError("Search cutoff %s larger than the cell size %s" % (cutoff, self.cell_size))
+        if not len(self.cell_ids):
+            return
+        # only the probes in the bounding box of the points enlarged by cutoff can be close to them
+        candidates = np.flatnonzero(
+            ((probe_coords >= self.origin - cutoff) & (probe_coords <= self.upper + cutoff)).all(axis=1)
+        )
+        candidate_coords = probe_coords[candidates]
+        candidate_cells = self._cells(candidate_coords)
+        block_size = max(1, PAIR_CHUNK_SIZE // int(self.cell_counts.max()))
+        for offset in product((-1, 0, 1), repeat=3):
+            neighbour_cells = candidate_cells + offset
+            in_grid = ((neighbour_cells >= 0) & (neighbour_cells < self.shape)).all(axis=1)
+            neighbour_ids = self._cell_ids(neighbour_cells)
+            position = np.minimum(np.searchsorted(self.cell_ids, neighbour_ids), len(self.cell_ids) - 1)
+            occupied = in_grid & (self.cell_ids[position] == neighbour_ids)
+            for block_start in range(0, len(candidates), block_size):
+                block_probes = np.flatnonzero(occupied[block_start:block_start + block_size]) + block_start
+                if not len(block_probes):
+                    continue
+                counts = self.cell_counts[position[block_probes]]
+                # every probe against every point of its neighbour cell
+                pair_starts = np.cumsum(counts) - counts
+                pair_points = np.repeat(
+                    self.cell_starts[position[block_probes]] - pair_starts, counts
+                ) + np.arange(counts.sum())
+                squared = (
+                    (np.repeat(candidate_coords[block_probes], counts, axis=0) - self.sorted_coords[pair_points]) ** 2
+                ).sum(axis=1)
+                yield candidates[block_probes], pair_starts, pair_points, squared
+
+    def min_distances(self, probe_coords, cutoff):
+        """Distance of every probe point to its closest point of the cell list, infinity if it is farther than cutoff.
+
+        Args:
+            probe_coords (array): M x 3 coordinates of the probe points.
+            cutoff (float): Maximum distance searched, up to the cell size.
+
+        Returns:
+            array: M distances.
+        """
+        probe_coords = np.asarray(probe_coords, dtype=np.float64).reshape(-1, 3)
+        min_squared = np.full(len(probe_coords), np.inf)
+        for probes, pair_starts, _, squared in self._pairs(probe_coords, cutoff):
+            min_squared[probes] = np.minimum(min_squared[probes], np.minimum.reduceat(squared, pair_starts))
+        distances = np.full(len(probe_coords), np.inf)
+        within = min_squared <= cutoff * cutoff
+        distances[within] = np.sqrt(min_squared[within])
+        return distances
+
+    def points_within_cutoff(self, probe_coords, cutoff):
+        """Mask of the points of the cell list closer than or at cutoff of any probe point.
+
+        Args:
+            probe_coords (array): M x 3 coordinates of the probe points.
+            cutoff (float): Maximum distance searched, up to the cell size.
+
+        Returns:
+            array: N booleans, in the order of the points of the cell list.
+        """
+        probe_coords = np.asarray(probe_coords, dtype=np.float64).reshape(-1, 3)
+        within = np.zeros(len(self.coords), dtype=bool)
+        for _, _, pair_points, squared in self._pairs(probe_coords, cutoff):
+            within[self.order[pair_points[squared <= cutoff * cutoff]]] = True
+        return within
+
+
+def box_vectors(box):
+    """Box vectors, one per row, of a GRO box line: the 3 edges of a rectangular box or the 9 values
+    v1(x) v2(y) v3(z) v1(y) v1(z) v2(x) v2(z) v3(x) v3(y) of a triclinic one; None for an empty box"""
+    box = [float(value) for value in box]
+    if len(box) < 3 or not all(box[:3]):
+        return None
+    vectors = np.diag(box[:3])
+    if len(box) >= 9:
+        vectors[0, 1], vectors[0, 2], vectors[1, 0], vectors[1, 2], vectors[2, 0], vectors[2, 1] = box[3:9]
+    return vectors
+
+
+def wrap_coordinates(coords, vectors):
+    """Coordinates translated by whole box vectors into the primary box"""
+    fractional = np.asarray(coords, dtype=np.float64).reshape(-1, 3) @ np.linalg.inv(vectors)
+    return (fractional - np.floor(fractional)) @ vectors
+
+
+def minimum_image(vectors_between, vectors):
+    """Vectors between points translated by whole box vectors to their shortest image, in fractional box
+    coordinates: exact for rectangular boxes and for vectors shorter than half the box in triclinic ones"""
+    fractional = np.asarray(vectors_between, dtype=np.float64).reshape(-1, 3) @ np.linalg.inv(vectors)
+    return (fractional - np.rint(fractional)) @ vectors
+
+
+def periodic_images(coords, vectors):
+    """Coordinates of the points in the primary box and in its 26 neighbour boxes. Searching the images of the
+    query points among points wrapped into the primary box finds the minimum image distances up to half the
+    shortest box height"""
+    shifts = np.array(list(product((-1, 0, 1), repeat=3)), dtype=np.float64) @ vectors
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    return (coords[np.newaxis] + shifts[:, np.newaxis]).reshape(-1, 3)
+
+
+def min_distances(coords, query_coords, cutoff):
+    """Distance of every point in coords to its closest point in query_coords, computed at once for all the
+    points through a cell list of the query points with cells of size cutoff; points farther than cutoff
+    of every query point get infinity.
+
+    Args:
+        coords (array): N x 3 coordinates.
+        query_coords (array): M x 3 coordinates of the query points.
+        cutoff (float): Maximum distance searched.
+
+    Returns:
+        array: N distances.
+    """
+    if cutoff < 0:
+        return np.full(len(np.asarray(coords).reshape(-1, 3)), np.inf)
+    return CellList(query_coords, cutoff).min_distances(coords, cutoff)
+
+
+def within_cutoff(coords, query_coords, cutoff):
+    """Mask of the points in coords closer than or at cutoff of any point in query_coords"""
+    return np.isfinite(min_distances(coords, query_coords, cutoff))
+
+
+def residues_within_cutoff(coords, atom_residues, query_coords, cutoff, cell_list=None):
+    """Sorted indices of the residues with at least one atom within cutoff of any query point.
+
+    Args:
+        coords (array): N x 3 atom coordinates.
+        atom_residues (array): N residue indices, one per atom.
+        query_coords (array): M x 3 coordinates of the query points.
+        cutoff (float): Maximum distance searched.
+        cell_list (CellList): (None) Cell list of coords to reuse, with a cell size not smaller than cutoff.
+
+    Returns:
+        array: residue indices.
+    """
+    if cell_list is None:
+        atoms_within = within_cutoff(coords, query_coords, cutoff)
+    else:
+        atoms_within = cell_list.points_within_cutoff(query_coords, cutoff)
+    return np.unique(np.asarray(atom_residues)[atoms_within])
+
+
+def residue_min_distances(coords, atom_residues, query_coords, cutoff):
+    """Distance of every residue to its closest query point, the minimum over its atoms.
+
+    Args:
+        coords (array): N x 3 atom coordinates.
+        atom_residues (array): N residue indices, one per atom.
+        query_coords (array): M x 3 coordinates of the query points.
+        cutoff (float): Maximum distance searched, residues farther than cutoff get infinity.
+
+    Returns:
+        tuple: sorted residue indices and their distances.
+    """
+    residues, atom_positions = np.unique(np.asarray(atom_residues), return_inverse=True)
+    distances = np.full(len(residues), np.inf)
+    np.minimum.at(distances, atom_positions.ravel(), min_distances(coords, query_coords, cutoff))
+    return residues, distances
+
+
+def nearest_residues(coords, atom_residues, query_coords, k, cutoff):
+    """The k residues closest to any query point, by the minimum distance of their atoms. The search starts
+    at cutoff and doubles it until k residues are found or every residue is within it.
+
+    Args:
+        coords (array): N x 3 atom coordinates.
+        atom_residues (array): N residue indices, one per atom.
+        query_coords (array): M x 3 coordinates of the query points.
+        k (int): Number of residues searched.
+        cutoff (float): Initial search distance.
+
+    Returns:
+        tuple: residue indices sorted by distance and their distances.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    query_coords = np.asarray(query_coords, dtype=np.float64).reshape(-1, 3)
+    if not len(coords) or not len(query_coords) or k < 1:
+        return np.empty(0, dtype=np.intp), np.empty(0)
+    # no distance is larger than the diagonal of the bounding box of all the points
+    span = np.linalg.norm(np.ptp(np.vstack((coords, query_coords)), axis=0))
+    cutoff = cutoff if cutoff > 0 else 1.0
+    while True:
+        residues, distances = residue_min_distances(coords, atom_residues, query_coords, cutoff)
+        found = np.flatnonzero(np.isfinite(distances))
+        if len(found) >= k or cutoff > span:
+            break
+        cutoff *= 2
+    nearest = found[np.argsort(distances[found], kind="stable")][:k]
+    return residues[nearest], distances[nearest]
@@ -2,6 +2,7 @@
 
 """Module containing the StructureCheck class and the command line interface."""
 
+import shlex
 from typing import Optional
 
 from biobb_common.generic.biobb_object import BiobbObject
@@ -13,6 +14,7 @@ from biobb_structure_utils.utils.common import (
     check_input_path,
     check_output_path_json,
 )
+from biobb_structure_utils.utils.structure_checking import run_check_structure
 
 
 class StructureCheck(BiobbObject):
@@ -27,6 +29,9 @@ class StructureCheck(BiobbObject):
         properties (dic - Python dictionary object containing the tool parameters, not input/output files):
             * **features** (*list*) - (None) Features to summarize. If None, all the features will be computed. Values: models (multiple molecules or coordinate sets in a single file), chains (multiple chains in a single file), altloc (atom alternative conformation given an alternate location indicator and occupancy), metals (metals present in the structure), ligands (heteroatoms present in the structure), chiral (to say that a structure is chiral is to say that its mirror image is not the same as it self), getss (detect SS bonds or disulfides), cistransbck (detact cis/trans backbone), backbone (detect backbone breaks), amide (detect too close amides), clashes (detect clashes).
             * **binary_path** (*string*) - ("check_structure") path to the check_structure application
+            * **in_process** (*bool*) - (False) Run check_structure through the biobb_structure_checking library in the current Python process instead of launching the binary_path application. Command lists are given inline instead of through temporary files. The output is captured from the process wide standard output, so the in process runs of concurrent threads are serialized. The container_path, timeout and env_vars_dict properties are not used.
+            * **use_worker_pool** (*bool*) - (False) Run check_structure in an idle process of a pool of long lived workers, instead of launching the binary_path application. The workers keep the biobb_structure_checking modules imported, saving the interpreter start up and the imports of every command; the residue and data libraries are still read by every command. The pool is shared by all the building blocks of the Python process, is started on first use and lasts until shutdown_worker_pool is called or the process exits. Command lists are given inline instead of through temporary files.
+            * **worker_pool_size** (*int*) - (None) Number of worker processes of the pool, by default the number of CPUs. A running pool of a different size is replaced.
             * **remove_tmp** (*bool*) - (True) [WF property] Remove temporal files.
             * **restart** (*bool*) - (False) [WF property] Do not execute if output files exist.
             * **sandbox_path** (*str*) - ("./") [WF property] Parent path to the sandbox directory.
@@ -70,6 +75,9 @@ class StructureCheck(BiobbObject):
 
         # Properties specific for BB
         self.binary_path = properties.get("binary_path", "check_structure")
+        self.in_process = properties.get("in_process", False)
+        self.use_worker_pool = properties.get("use_worker_pool", False)
+        self.worker_pool_size = properties.get("worker_pool_size", None)
         self.features = _from_string_to_list(properties.get("features", None))
         self.properties = properties
 
@@ -119,15 +127,19 @@ class StructureCheck(BiobbObject):
         else:
             fu.log("Computing features: %s" % ", ".join(self.features), self.out_log)
 
-            # create temporary folder
-            tmp_folder = fu.create_unique_dir()
-            fu.log("Creating %s temporary folder" % tmp_folder, self.out_log)
+            if self.in_process or self.use_worker_pool:
+                # the command list is given inline
+                command_list = shlex.quote(";".join(self.features))
+            else:
+                # create temporary folder
+                tmp_folder = fu.create_unique_dir()
+                fu.log("Creating %s temporary folder" % tmp_folder, self.out_log)
 
-            command_list = tmp_folder + "/command_list.lst"
+                command_list = tmp_folder + "/command_list.lst"
 
-            with open(command_list, "w") as f:
-                for item in self.features:
-                    f.write("%s\n" % item)
+                with open(command_list, "w") as f:
+                    for item in self.features:
+                        f.write("%s\n" % item)
 
             self.cmd = [
                 self.binary_path,
@@ -143,7 +155,10 @@ class StructureCheck(BiobbObject):
             ]
 
         # Run Biobb block
-        self.run_biobb()
+        if self.in_process or self.use_worker_pool:
+            self.return_code = run_check_structure(self)
+        else:
+            self.run_biobb()
 
         # Copy files to host
         self.copy_to_host()
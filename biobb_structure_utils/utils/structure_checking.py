@@ -0,0 +1,150 @@
+"""In process and worker pool execution of check_structure commands for package biobb_structure_utils.utils"""
+
+import atexit
+import contextlib
+import io
+import os
+import shlex
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import biobb_structure_checking
+import biobb_structure_checking.constants as cts
+from biobb_common.tools import file_utils as fu
+from biobb_structure_checking.structure_checking import StructureChecking
+
+# pool of check_structure worker processes shared by all the building blocks, see start_worker_pool
+_worker_pool = None
+_worker_pool_size = 0
+_worker_pool_lock = threading.Lock()
+# the output of check_structure is captured from the process wide sys.stdout and sys.stderr, so the in process
+# runs of the threads of a process are serialized
+_in_process_lock = threading.Lock()
+# properties of the building blocks only used when the check_structure binary is launched
+SUBPROCESS_PROPERTIES = ("container_path", "timeout", "env_vars_dict")
+
+
+def check_structure_in_process(cmd):
+    """Runs a check_structure command line through the biobb_structure_checking API in the current process.
+    The command is given as for run_biobb, binary first, and is split as the shell would split it, so a
+    command list given inline, ie --list 'water --remove Yes;ligands --remove All', keeps its meaning.
+    The output is captured by redirecting the process wide standard output and error, so concurrent calls
+    from several threads run one at a time, and anything other threads print meanwhile is captured too.
+
+    Args:
+        cmd (list): Command line words, starting with the check_structure binary.
+
+    Returns:
+        tuple: exit code, standard output and standard error of the command.
+    """
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    return_code = 0
+    with _in_process_lock, contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            args = cts.CMD_LINE.parse_args(shlex.split(" ".join(str(word) for word in cmd[1:])))
+            StructureChecking(biobb_structure_checking.__path__[0], vars(args)).launch()
+        except SystemExit as exit:
+            # check_structure ends with sys.exit(message) on errors
+            if isinstance(exit.code, int):
+                return_code = exit.code
+            elif exit.code is not None:
+                stderr.write("%s\n" % exit.code)
+                return_code = 1
+        except Exception:
+            # as the interpreter of a check_structure process would do
+            traceback.print_exc()
+            return_code = 1
+    return return_code, stdout.getvalue(), stderr.getvalue()
+
+
+def _check_structure_in_directory(cmd, cwd):
+    """Runs check_structure_in_process from the working directory of the building block"""
+    os.chdir(cwd)
+    return check_structure_in_process(cmd)
+
+
+def start_worker_pool(size=None):
+    """Starts the pool of long lived worker processes running the check_structure commands of the building blocks
+    with use_worker_pool, which keep the biobb_structure_checking modules imported from one command to the next;
+    every command still builds its own StructureManager, reading the residue and data libraries. A running
+    pool is reused when size is None or its own size, otherwise it is shut down and replaced.
+
+    Args:
+        size (int): (None) Number of worker processes, by default the number of CPUs.
+
+    Returns:
+        ProcessPoolExecutor: the worker pool.
+    """
+    global _worker_pool, _worker_pool_size
+    with _worker_pool_lock:
+        if _worker_pool is not None and size in (None, _worker_pool_size):
+            return _worker_pool
+        if _worker_pool is not None:
+            _worker_pool.shutdown(wait=True)
+        _worker_pool_size = int(size or os.cpu_count() or 1)
+        _worker_pool = ProcessPoolExecutor(max_workers=_worker_pool_size)
+        return _worker_pool
+
+
+def shutdown_worker_pool():
+    """Shuts down the worker pool, if started, once the commands already dispatched to it end. It is also
+    shut down at the exit of the interpreter"""
+    global _worker_pool, _worker_pool_size
+    with _worker_pool_lock:
+        if _worker_pool is not None:
+            _worker_pool.shutdown(wait=True)
+        _worker_pool = None
+        _worker_pool_size = 0
+
+
+atexit.register(shutdown_worker_pool)
+
+
+@contextlib.contextmanager
+def worker_pool(size=None):
+    """Context manager running a batch of building blocks with a worker pool of size processes, shut down
+    at the end of the batch::
+
+        with worker_pool(4):
+            for ligand in ligands:
+                str_check_add_hydrogens(..., properties={"use_worker_pool": True})
+    """
+    start_worker_pool(size)
+    try:
+        yield
+    finally:
+        shutdown_worker_pool()
+
+
+def run_check_structure(tool):
+    """Runs the check_structure command line of a building block, tool.cmd, in process through
+    check_structure_in_process, or in an idle process of the worker pool if tool.use_worker_pool is set,
+    logging its output as run_biobb does. Returns the exit code"""
+    ignored = [name for name in SUBPROCESS_PROPERTIES if getattr(tool, name, None)]
+    if tool.binary_path != "check_structure":
+        ignored.append("binary_path")
+    if ignored:
+        fu.log(
+            "Warning: %s not used, check_structure is not launched as a process with %s"
+            % (", ".join(ignored), "use_worker_pool" if tool.use_worker_pool else "in_process"),
+            tool.out_log,
+            tool.global_log,
+        )
+    if tool.use_worker_pool:
+        fu.log("Worker pool: " + " ".join(str(word) for word in tool.cmd), tool.out_log, tool.global_log)
+        return_code, stdout, stderr = (
+            start_worker_pool(tool.worker_pool_size)
+            .submit(_check_structure_in_directory, tool.cmd, os.getcwd())
+            .result()
+        )
+    else:
+        fu.log("In process: " + " ".join(str(word) for word in tool.cmd), tool.out_log, tool.global_log)
+        return_code, stdout, stderr = check_structure_in_process(tool.cmd)
+    fu.log("Exit code %d" % return_code, tool.out_log, tool.global_log)
+    if stdout.strip():
+        fu.log(stdout.rstrip(), tool.out_log)
+    if stderr.strip():
+        fu.log(stderr.rstrip(), tool.err_log)
+    return return_code
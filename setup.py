@@ -19,7 +19,7 @@ setuptools.setup(
     },
     packages=setuptools.find_packages(exclude=["docs", "test"]),
     package_data={"biobb_structure_utils": ["py.typed"]},
-    install_requires=["biobb_common==5.2.2", "biobb_structure_checking>=3.15.6"],
+    install_requires=["biobb_common==5.2.2", "biobb_structure_checking>=3.15.6", "numpy"],
     python_requires=">=3.10",
     entry_points={
         "console_scripts": [